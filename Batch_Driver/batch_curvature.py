@@ -0,0 +1,127 @@
+import argparse
+import csv
+import os
+from itertools import islice
+from multiprocessing import Pool
+
+from Graph_IO.graph_readers import read_graphs, READERS
+from Devos_Mohar_curvature.devos_mohar_curvature import devos_mohar_curvature
+from Forman_Curvature.forman_curvature_3polytope_graph import forman
+from Forman_Curvature.p_k_vector_3polytope_graph import p_k_vector
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature_result
+
+# Runs one curvature over a collection of graphs in a process pool.
+#
+# Results are appended to a CSV file with columns graph_id, values (the curvature values,
+# space separated), error as each chunk of graphs finishes. A graph the curvature fails on
+# (e.g. a non-planar graph under forman) gets a row with no values and the exception in the
+# error column, and the run goes on. Graphs already in the output file, failed or not, are
+# skipped, so an interrupted run picks up where it stopped.
+#
+# usage:
+# python -m Batch_Driver.batch_curvature --format graph6 --curvature devos_mohar -o out.csv graphs.g6
+
+
+# every curvature is called as f(A, rotation); the planar ones use the rotation system
+# read from planar_code (when there is one) instead of testing planarity again
+CURVATURES = {
+    'devos_mohar': devos_mohar_curvature,
+    'forman': lambda A, rotation: list(forman(A, rotation).values()),
+    'p_vector': p_k_vector,
+    'dos_resistance': lambda A, rotation: res_curvature(A),
+    'node_resistance': lambda A, rotation: node_res_curvature(A),
+    # link curvature on the edges u < v, in row-major order
+    'link_resistance': lambda A, rotation: link_res_curvature_result(A).tolist(),
+}
+
+
+def _run(task):
+    # returns: (graph_id, values, error) with error '' on success
+    curvature, graph_id, A, rotation = task
+    try:
+        return graph_id, CURVATURES[curvature](A, rotation), ''
+    except Exception as e:
+        return graph_id, [], '{}: {}'.format(type(e).__name__, e)
+
+
+def _finished_graphs(output):
+    # graph ids already written to the output file; drops a partially written last line
+    if not os.path.exists(output):
+        return set()
+    with open(output, 'rb+') as f:
+        # look for the last newline from the end, a block at a time
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+    # stream the rows, keeping only the id column
+    with open(output, newline='') as f:
+        rows = csv.reader(f)
+        next(rows, None)
+        return set(row[0] for row in rows if row)
+
+
+def run_batch(paths, fmt, curvature, output, workers=None, chunksize=16):
+    # input:
+    # paths (list of strings) - graph files, read in order
+    # fmt (string) - 'graph6', 'planar_code' or 'edgelist'
+    # curvature (string) - one of CURVATURES
+    # output (string) - CSV file results are appended to
+    # workers (int or None) - number of processes (all cores if None)
+    # chunksize (int) - graphs handed to a worker at a time
+    # returns:
+    # n_done (int) - number of graphs computed in this run, failed ones included
+    if curvature not in CURVATURES:
+        raise ValueError("unknown curvature {!r}".format(curvature))
+
+    finished = _finished_graphs(output)
+    write_header = not finished and not (os.path.exists(output) and os.path.getsize(output) > 0)
+
+    tasks = ((curvature, graph_id, A, rotation) for graph_id, A, rotation in read_graphs(paths, fmt) if graph_id not in finished)
+
+    # hand the pool a bounded number of graphs at a time so the input is streamed
+    batch_size = chunksize * (workers or os.cpu_count() or 1) * 4
+
+    n_done = 0
+    with Pool(workers) as pool, open(output, 'a', newline='') as out:
+        writer = csv.writer(out)
+        if write_header:
+            writer.writerow(['graph_id', 'values', 'error'])
+        while True:
+            batch = list(islice(tasks, batch_size))
+            if not batch:
+                break
+            for graph_id, values, error in pool.imap_unordered(_run, batch, chunksize):
+                writer.writerow([graph_id, ' '.join(str(x) for x in values), error])
+                n_done += 1
+            out.flush()
+            os.fsync(out.fileno())
+
+    return n_done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute a curvature for every graph in a collection.")
+    parser.add_argument('paths', nargs='+', help="graph files")
+    parser.add_argument('--format', required=True, choices=sorted(READERS), help="input format")
+    parser.add_argument('--curvature', required=True, choices=sorted(CURVATURES), help="curvature to compute")
+    parser.add_argument('-o', '--output', required=True, help="CSV file to append results to")
+    parser.add_argument('--workers', type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument('--chunksize', type=int, default=16, help="graphs per work unit")
+    args = parser.parse_args(argv)
+    n_done = run_batch(args.paths, args.format, args.curvature, args.output, args.workers, args.chunksize)
+    print("{} graphs computed".format(n_done))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import csv
+import re
+from itertools import islice
+from multiprocessing import Pool
+
+import numpy as np
+
+from Graph_IO.graph_readers import read_graphs, READERS
+from Face_Lattice.planar_face_lattice import planar_face_lattice
+
+# Summary tables of p-vectors (numbers of k-gonal faces) over a corpus of planar graphs,
+# in the format of barnette_objects.4.csv.
+#
+# Each graph goes through its face lattice (using the rotation system read from planar_code,
+# if any), the face-size histogram is np.bincount(np.diff(face_offsets)), and the requested
+# columns are read off the histogram:
+#   pK              - number of K-gonal faces
+#   sum_pk_after_pK - number of faces with more than K sides
+# Rows are collected in a fixed-size int64 buffer and written to CSV (or Parquet, with
+# pyarrow) one buffer at a time. With group=True identical rows are counted instead,
+# and the table of distinct rows with a count column is written at the end; memory then
+# grows with the number of distinct p-vectors, never with the number of graphs.
+#
+# usage:
+# python -m Batch_Driver.p_vector_table --format planar_code -o barnette.csv graphs.pc
+# python -m Batch_Driver.p_vector_table --format planar_code --columns p3 p4 p5 --group -o counts.csv graphs.pc
+
+BARNETTE_COLUMNS = ('p3', 'p5', 'p6', 'sum_pk_after_p6')
+
+_COLUMN = re.compile(r'^(p|sum_pk_after_p)(\d+)$')
+
+
+def _parse_columns(columns):
+    # returns: list of (is_sum, k) for each column name
+    parsed = []
+    for name in columns:
+        match = _COLUMN.match(name)
+        if match is None:
+            raise ValueError("unknown column {!r} (expected pK or sum_pk_after_pK)".format(name))
+        parsed.append((match.group(1) == 'sum_pk_after_p', int(match.group(2))))
+    return parsed
+
+
+def face_size_histogram(A, rotation=None):
+    # input: A (numpy array or scipy sparse matrix) Adjacency Matrix of a planar graph,
+    # rotation (optional) rotation system or embedding, see planar_face_lattice
+    # returns: histogram (numpy array) number of faces of each size 0, 1, 2, ...
+    lattice = planar_face_lattice(A, rotation)
+    return np.bincount(np.diff(lattice.face_offsets))
+
+
+def project(histogram, parsed):
+    # values of the parsed columns for one face-size histogram
+    # (the number of faces with more than k sides is the total minus those with at most k)
+    cumulative = np.cumsum(histogram)
+    top = len(histogram) - 1
+    row = []
+    for is_sum, k in parsed:
+        if is_sum:
+            row.append(int(cumulative[-1] - cumulative[min(k, top)]))
+        else:
+            row.append(int(histogram[k]) if k <= top else 0)
+    return row
+
+
+def _row(task):
+    parsed, A, rotation = task
+    return project(face_size_histogram(A, rotation), parsed)
+
+
+class _CSVSink:
+
+    def __init__(self, path, header):
+        self.f = open(path, 'w', newline='')
+        csv.writer(self.f).writerow(header)
+
+    def write(self, rows):
+        np.savetxt(self.f, rows, fmt='%d', delimiter=',')
+
+    def close(self):
+        self.f.close()
+
+
+class _ParquetSink:
+
+    def __init__(self, path, header):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.header = header
+        self.writer = pq.ParquetWriter(path, pa.schema([(name, pa.int64()) for name in header]))
+
+    def write(self, rows):
+        # one row group per buffer
+        columns = [self.pa.array(np.ascontiguousarray(rows[:, j])) for j in range(rows.shape[1])]
+        self.writer.write_table(self.pa.table(dict(zip(self.header, columns))))
+
+    def close(self):
+        self.writer.close()
+
+
+SINKS = {'csv': _CSVSink, 'parquet': _ParquetSink}
+
+
+def p_vector_table(paths, fmt, output, columns=BARNETTE_COLUMNS, group=False, out_format='csv', buffer_rows=65536, workers=1, chunksize=64):
+    # input:
+    # paths (list of strings) - graph files, read in order
+    # fmt (string) - 'graph6', 'planar_code' or 'edgelist'
+    # output (string) - file to write (overwritten)
+    # columns (list of strings) - pK and sum_pk_after_pK columns, in order
+    # group (bool) - write each distinct row once with a count column instead of one row per graph
+    # out_format (string) - 'csv' or 'parquet'
+    # buffer_rows (int) - rows written at a time
+    # workers (int) - number of processes computing histograms (1 computes them in this process)
+    # chunksize (int) - graphs handed to a worker at a time
+    # returns:
+    # n_graphs (int) - number of graphs read
+    parsed = _parse_columns(columns)
+    header = list(columns) + (['count'] if group else [])
+    sink = SINKS[out_format](output, header)
+
+    tasks = ((parsed, A, rotation) for graph_id, A, rotation in read_graphs(paths, fmt))
+    pool = Pool(workers) if workers > 1 else None
+
+    buffer = np.empty((buffer_rows, len(parsed)), dtype=np.int64)
+    counts = {}
+    n_graphs = 0
+    try:
+        while True:
+            # hand out one buffer of graphs at a time so the input is streamed
+            batch = list(islice(tasks, buffer_rows))
+            if not batch:
+                break
+            rows = pool.imap(_row, batch, chunksize) if pool is not None else map(_row, batch)
+            filled = 0
+            for row in rows:
+                buffer[filled] = row
+                filled += 1
+            n_graphs += filled
+            if group:
+                distinct, n_each = np.unique(buffer[:filled], axis=0, return_counts=True)
+                for row, n in zip(map(tuple, distinct.tolist()), n_each.tolist()):
+                    counts[row] = counts.get(row, 0) + n
+            else:
+                sink.write(buffer[:filled])
+        if group and counts:
+            table = np.array([row + (n,) for row, n in sorted(counts.items())], dtype=np.int64)
+            for start in range(0, len(table), buffer_rows):
+                sink.write(table[start:start + buffer_rows])
+    finally:
+        if pool is not None:
+            pool.terminate()
+        sink.close()
+    return n_graphs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a table of p-vectors for every graph in a collection.")
+    parser.add_argument('paths', nargs='+', help="graph files")
+    parser.add_argument('--format', required=True, choices=sorted(READERS), help="input format")
+    parser.add_argument('-o', '--output', required=True, help="file to write")
+    parser.add_argument('--columns', nargs='+', default=list(BARNETTE_COLUMNS), help="pK and sum_pk_after_pK columns (default: %(default)s)")
+    parser.add_argument('--group', action='store_true', help="count identical rows instead of writing one row per graph")
+    parser.add_argument('--output-format', choices=sorted(SINKS), default='csv', help="output format")
+    parser.add_argument('--buffer-rows', type=int, default=65536, help="rows written at a time")
+    parser.add_argument('--workers', type=int, default=1, help="number of processes")
+    parser.add_argument('--chunksize', type=int, default=64, help="graphs per work unit")
+    args = parser.parse_args(argv)
+    n_graphs = p_vector_table(args.paths, args.format, args.output, args.columns, args.group, args.output_format,
+                              args.buffer_rows, args.workers, args.chunksize)
+    print("{} graphs read".format(n_graphs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+import scipy.sparse as sp
+from scipy.spatial import ConvexHull, Delaunay
+
+from Devos_Mohar_curvature.devos_mohar_curvature import devos_mohar_curvature
+from Forman_Curvature.forman_curvature_3polytope_graph import forman
+from Forman_Curvature.p_k_vector_3polytope_graph import p_k_vector
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature
+
+# Scaling benchmarks for the curvature routines.
+#
+# Every routine is timed (best of `repeat` runs) and memory-profiled (tracemalloc peak) on
+# seeded, offline-generated planar families over a range of sizes. For each routine and
+# family the empirical complexity exponent is the slope of log(time) against log(n).
+# Results go to a JSON file; `compare` reports the time ratio between two such files,
+# e.g. from two commits.
+#
+# The SageMath routines (forman_curvature_sagemath, p_k_vector_sagemath) need Sage and are
+# not covered.
+#
+# usage:
+# python -m Benchmarks.benchmark_curvatures run -o bench.json
+# python -m Benchmarks.benchmark_curvatures compare old.json new.json
+
+
+def _csr_from_edges(n, u, v):
+    A = sp.csr_matrix((np.ones(2 * len(u)), (np.concatenate([u, v]), np.concatenate([v, u]))), shape=(n, n))
+    A.data[:] = 1
+    return A
+
+
+def _triangle_edges(triangles):
+    u = np.concatenate([triangles[:, 0], triangles[:, 1], triangles[:, 2]])
+    v = np.concatenate([triangles[:, 1], triangles[:, 2], triangles[:, 0]])
+    return np.minimum(u, v), np.maximum(u, v)
+
+
+def delaunay(n, seed=0):
+    # Delaunay triangulation of n random points in the unit square
+    points = np.random.default_rng(seed).random((n, 2))
+    u, v = _triangle_edges(Delaunay(points).simplices)
+    return _csr_from_edges(n, u, v)
+
+
+def fullerene_like(n, seed=0):
+    # cubic 3-connected planar graph on n (even) vertices: the dual of the convex hull
+    # of n/2 + 2 random points on the sphere (as fullerenes are duals of triangulated spheres)
+    points = np.random.default_rng(seed).normal(size=(n // 2 + 2, 3))
+    hull = ConvexHull(points / np.linalg.norm(points, axis=1)[:, None])
+    # hull.neighbors[t] are the triangles across the edges of triangle t
+    t = np.repeat(np.arange(len(hull.simplices)), 3)
+    s = hull.neighbors.ravel()
+    keep = t < s
+    return _csr_from_edges(len(hull.simplices), t[keep], s[keep])
+
+
+def grid(n, seed=0):
+    # square grid with about n vertices
+    side = max(2, int(round(np.sqrt(n))))
+    idx = np.arange(side * side).reshape(side, side)
+    u = np.concatenate([idx[:, :-1].ravel(), idx[:-1, :].ravel()])
+    v = np.concatenate([idx[:, 1:].ravel(), idx[1:, :].ravel()])
+    return _csr_from_edges(side * side, u, v)
+
+
+def wheel(n, seed=0):
+    # hub 0 joined to a cycle 1, ..., n - 1
+    rim = np.arange(1, n)
+    u = np.concatenate([np.zeros(n - 1, dtype=np.int64), rim])
+    v = np.concatenate([rim, np.roll(rim, -1)])
+    return _csr_from_edges(n, u, v)
+
+
+def prism(n, seed=0):
+    # two (n/2)-cycles joined by a perfect matching
+    k = n // 2
+    ring = np.arange(k)
+    u = np.concatenate([ring, ring + k, ring])
+    v = np.concatenate([np.roll(ring, -1), np.roll(ring, -1) + k, ring + k])
+    return _csr_from_edges(2 * k, u, v)
+
+
+FAMILIES = {
+    'delaunay': delaunay,
+    'fullerene_like': fullerene_like,
+    'grid': grid,
+    'wheel': wheel,
+    'prism': prism,
+}
+
+# routine name -> (function of the sparse adjacency matrix, default sizes)
+ROUTINES = {
+    'devos_mohar_curvature': (devos_mohar_curvature, [250, 500, 1000, 2000, 4000]),
+    'forman': (forman, [250, 500, 1000, 2000, 4000]),
+    'p_k_vector': (p_k_vector, [250, 500, 1000, 2000, 4000]),
+    'res_curvature': (res_curvature, [100, 200, 400, 800]),
+    'node_res_curvature': (node_res_curvature, [100, 200, 400, 800]),
+    'link_res_curvature': (link_res_curvature, [100, 200, 400, 800]),
+    'node_res_curvature_sparse': (lambda A: node_res_curvature(A, sparse=True), [250, 500, 1000, 2000, 4000]),
+}
+
+
+def measure(func, A, repeat=3):
+    # returns: seconds (float) best wall time, peak_bytes (int) peak traced allocation of one call
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(A)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(A)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak_bytes
+
+
+def fit_exponent(sizes, values):
+    # slope of log(values) against log(sizes)
+    if len(sizes) < 2:
+        return None
+    return float(np.polyfit(np.log(sizes), np.log(np.maximum(values, 1e-12)), 1)[0])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(routines=None, families=None, sizes=None, repeat=3, seed=0):
+    # input:
+    # routines, families (lists of strings or None) - subsets of ROUTINES and FAMILIES (all if None)
+    # sizes (list of ints or None) - sizes to use for every routine (each routine's defaults if None)
+    # repeat (int) - timed runs per measurement, the best is kept
+    # seed (int) - seed of the random families
+    # returns:
+    # report (dictionary) - 'meta', 'results' (one record per routine, family and size) and
+    #                       'exponents' (time and memory exponent per routine and family)
+    routines = routines or list(ROUTINES)
+    families = families or list(FAMILIES)
+    results = []
+    exponents = []
+    for name in routines:
+        func, default_sizes = ROUTINES[name]
+        for family in families:
+            records = []
+            for n in (sizes or default_sizes):
+                A = FAMILIES[family](n, seed)
+                seconds, peak_bytes = measure(func, A, repeat)
+                records.append({
+                    'routine': name, 'family': family, 'n': int(A.shape[0]), 'edges': int(A.nnz // 2),
+                    'seconds': seconds, 'peak_bytes': int(peak_bytes),
+                })
+            results += records
+            ns = [r['n'] for r in records]
+            exponents.append({
+                'routine': name, 'family': family,
+                'time_exponent': fit_exponent(ns, [r['seconds'] for r in records]),
+                'memory_exponent': fit_exponent(ns, [r['peak_bytes'] for r in records]),
+            })
+    meta = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'seed': seed,
+    }
+    return {'meta': meta, 'results': results, 'exponents': exponents}
+
+
+def compare(old, new):
+    # input: old, new (dictionaries) two reports of run_benchmarks
+    # returns: list of (routine, family, n, old seconds, new seconds, new / old) for the measurements in both
+    old_times = {(r['routine'], r['family'], r['n']): r['seconds'] for r in old['results']}
+    rows = []
+    for r in new['results']:
+        key = (r['routine'], r['family'], r['n'])
+        if key in old_times:
+            rows.append(key + (old_times[key], r['seconds'], r['seconds'] / old_times[key]))
+    return rows
+
+
+def _format_exponent(exponent):
+    # fit_exponent gives None with fewer than two sizes
+    return 'n/a' if exponent is None else 'n^{:.2f}'.format(exponent)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the curvature routines.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('-o', '--output', required=True, help="JSON file to write")
+    run_parser.add_argument('--routines', nargs='+', choices=sorted(ROUTINES), help="routines to time (default: all)")
+    run_parser.add_argument('--families', nargs='+', choices=sorted(FAMILIES), help="graph families (default: all)")
+    run_parser.add_argument('--sizes', nargs='+', type=int, help="sizes for every routine (default: per routine)")
+    run_parser.add_argument('--repeat', type=int, default=3, help="timed runs per measurement")
+    run_parser.add_argument('--seed', type=int, default=0, help="seed of the random families")
+
+    compare_parser = commands.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        report = run_benchmarks(args.routines, args.families, args.sizes, args.repeat, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+        for e in report['exponents']:
+            print("{:28s} {:15s} time ~ {}  memory ~ {}".format(
+                e['routine'], e['family'], _format_exponent(e['time_exponent']), _format_exponent(e['memory_exponent'])))
+    else:
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        for routine, family, n, old_s, new_s, ratio in compare(old, new):
+            print("{:28s} {:15s} n={:<8d} {:10.4f}s -> {:10.4f}s  x{:.2f}".format(routine, family, n, old_s, new_s, ratio))
+
+
+if __name__ == '__main__':
+    main()
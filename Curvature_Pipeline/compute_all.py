@@ -0,0 +1,140 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Face_Lattice.planar_face_lattice import FaceLattice, planar_face_lattice
+from Devos_Mohar_curvature.devos_mohar_curvature import devos_mohar_curvature_result
+from Forman_Curvature.forman_curvature_3polytope_graph import forman_arrays
+from Forman_Curvature.p_k_vector_3polytope_graph import p_k_vector
+from Effective_Resistance_Curvatures.resistance_context import ResistanceContext
+from Effective_Resistance_Curvatures.sparse_resistance import edge_list, node_curvature_from_edges
+from Face_Lattice.embedding_cache import embedding_param
+from Graph_IO.graph_cache import graph_key
+from Instrumentation.instrumentation import phase
+
+# Every curvature of one graph in a single pass.
+#
+# The planar measures share one face lattice and the resistance measures share one
+# factorized Laplacian (a ResistanceContext). Each intermediate is built the first time a
+# requested measure needs it, so asking only for, say, Forman curvature never touches the
+# Laplacian, and asking only for resistance curvatures never tests planarity.
+#
+# With a ResultCache, every measure and the intermediates (the face lattice and the
+# resistances across the edges with diag(L+)) are looked up on disk first and stored
+# after being computed, so a graph seen before costs a few file reads. The planar entries
+# are keyed by the graph and the embedding, the resistance entries by the graph and the
+# solve mode (dense or sparse).
+
+PLANAR = ('devos_mohar', 'forman', 'p_vector')
+RESISTANCE = ('node_resistance', 'link_resistance', 'dos_resistance')
+ALL = PLANAR + RESISTANCE
+
+
+def compute_all(graph, which=ALL, embedding=None, sparse=False, cache=None):
+    # input:
+    # graph (numpy array or scipy sparse matrix) - Adjacency Matrix of the graph (planar, for the planar measures)
+    # which (tuple of strings) - measures to compute, any of ALL
+    # embedding (optional) - planar embedding, rotation system or FaceLattice of the graph, see planar_face_lattice
+    # sparse (bool) - use sparse Laplacian solves for the resistance measures
+    # cache (ResultCache, optional) - on-disk cache of results and intermediates, see result_cache
+    # returns:
+    # report (dictionary) with
+    #   'vertices' - dict of columns: 'vertex' and one array per requested vertex measure
+    #                (devos_mohar, node_resistance, dos_resistance)
+    #   'edges'    - dict of columns: 'u', 'v' (u < v) and one array per requested edge measure
+    #                (forman, link_resistance)
+    #   'p_vector' - list (p_3, p_4, ...), if requested
+    unknown = set(which) - set(ALL)
+    if unknown:
+        raise ValueError("unknown measures: {}".format(sorted(unknown)))
+
+    n = graph.shape[0] if sp.issparse(graph) else len(graph)
+    shared = {}
+    keys = {}
+
+    def cached(name, compute):
+        # compute() returns a dictionary of arrays
+        if cache is None:
+            return compute()
+        group = 'planar' if name in ('face_lattice',) + PLANAR else 'resistance'
+        if group not in keys:
+            param = embedding_param(embedding, n) if group == 'planar' else ('sparse' if sparse else 'dense')
+            keys[group] = graph_key(graph, group, param)
+        return cache.cached(keys[group], name, compute)
+
+    def lattice():
+        if 'lattice' not in shared:
+            arrays = cached('face_lattice', lambda: planar_face_lattice(graph, embedding).arrays())
+            shared['lattice'] = FaceLattice.from_arrays(arrays)
+        return shared['lattice']
+
+    def context():
+        if 'context' not in shared:
+            shared['context'] = ResistanceContext(graph, sparse)
+        return shared['context']
+
+    def resistances():
+        # edges, weights, resistance across each edge and diag(L+)
+        if 'resistances' not in shared:
+            def compute():
+                edges_u, edges_v, weights, omega, lplus_diag = context().edge_resistances()
+                return dict(u=edges_u, v=edges_v, weights=weights, omega=omega, lplus_diag=lplus_diag)
+            shared['resistances'] = cached('resistances', compute)
+        return shared['resistances']
+
+    def edges():
+        if 'edges' not in shared:
+            if 'lattice' in shared:
+                shared['edges'] = shared['lattice'].edge_verts[:, 0], shared['lattice'].edge_verts[:, 1]
+            elif 'resistances' in shared:
+                shared['edges'] = shared['resistances']['u'], shared['resistances']['v']
+            else:
+                shared['edges'] = edge_list(graph)[:2]
+        return shared['edges']
+
+    def node_curvature():
+        r = resistances()
+        return node_curvature_from_edges(n, r['u'], r['v'], r['weights'], r['omega'])
+
+    def link_curvature():
+        # 2 (p_u + p_v) / Omega[u, v] on each edge, in edge order
+        r = resistances()
+        p = node_curvature()
+        return 2 * (p[r['u']] + p[r['v']]) / r['omega']
+
+    report = {'vertices': {}, 'edges': {}}
+    vertices = report['vertices']
+    edge_columns = report['edges']
+
+    # each measure is a phase of its own (shared intermediates are charged to the first one needing them)
+    if 'devos_mohar' in which:
+        with phase('devos_mohar'):
+            vertices['devos_mohar'] = cached('devos_mohar', lambda: dict(
+                values=devos_mohar_curvature_result(graph, lattice()).values))['values']
+    if 'forman' in which:
+        with phase('forman'):
+            edge_columns['forman'] = cached('forman', lambda: dict(
+                values=forman_arrays(graph, lattice())[2]))['values']
+    if 'p_vector' in which:
+        with phase('p_vector'):
+            report['p_vector'] = cached('p_vector', lambda: dict(
+                values=np.asarray(p_k_vector(graph, lattice()), dtype=np.int64)))['values'].tolist()
+
+    if 'node_resistance' in which:
+        with phase('node_resistance'):
+            vertices['node_resistance'] = cached('node_resistance', lambda: dict(values=node_curvature()))['values']
+    if 'dos_resistance' in which:
+        with phase('dos_resistance'):
+            vertices['dos_resistance'] = cached('dos_resistance', lambda: dict(
+                values=np.asarray(context().res_curvature())))['values']
+    if 'link_resistance' in which:
+        with phase('link_resistance'):
+            edge_columns['link_resistance'] = cached('link_resistance', lambda: dict(values=link_curvature()))['values']
+
+    # key columns first
+    if vertices:
+        report['vertices'] = dict(vertex=np.arange(n), **vertices)
+    if edge_columns:
+        edges_u, edges_v = edges()
+        report['edges'] = dict(u=edges_u, v=edges_v, **edge_columns)
+
+    return report
@@ -0,0 +1,138 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from Graph_IO.graph_cache import save_npz_atomic
+from Instrumentation.instrumentation import count
+
+# On-disk cache of curvature results and of the intermediates they are built from.
+#
+# Entries are content-addressed .npz files
+#   <directory>/<key>/<name>.v<version>.npz
+# holding a dictionary of arrays: a curvature ('devos_mohar', 'forman', ...) or an
+# intermediate ('face_lattice', 'resistances'). The version of each name is in VERSIONS;
+# bumping it when an implementation changes makes the old entries unreachable, and they
+# age out through eviction.
+#
+# The key is Graph_IO.graph_cache.graph_key of the graph and of the parameters the entries
+# under it depend on (see compute_all).
+#
+# Reads refresh the modification time of an entry; when the directory grows past max_bytes
+# the least recently used entries are removed. The directory is scanned once, when the cache
+# is opened; from then on an index of the entries in order of use and their total size are
+# kept in memory, so a get or put never lists the directory. (Entries written by another
+# process after that are only seen by a cache opened later.)
+
+VERSIONS = {
+    'face_lattice': 1,
+    'resistances': 1,
+    'devos_mohar': 1,
+    'forman': 1,
+    'p_vector': 1,
+    'node_resistance': 1,
+    'link_resistance': 1,
+    'dos_resistance': 1,
+}
+
+
+class ResultCache:
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        # directory (string) where the entries are kept, created if needed
+        # max_bytes (int) bound on the total size of the entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # path -> size, least recently used first
+        self._index = OrderedDict((path, size) for _, size, path in sorted(self._entries()))
+        self._total = sum(self._index.values())
+
+    def path(self, key, name):
+        return os.path.join(self.directory, key, '{}.v{}.npz'.format(name, VERSIONS[name]))
+
+    def get(self, key, name):
+        # returns: arrays (dictionary of numpy arrays) stored under (key, name), or None
+        path = self.path(key, name)
+        try:
+            with np.load(path) as data:
+                arrays = {k: data[k] for k in data.files}
+        except FileNotFoundError:
+            self._forget(path)
+            count('result_cache_misses')
+            return None
+        os.utime(path)
+        self._touch(path, self._index[path] if path in self._index else os.path.getsize(path))
+        count('result_cache_hits')
+        return arrays
+
+    def put(self, key, name, arrays):
+        # store arrays (dictionary of numpy arrays) under (key, name), then evict down to max_bytes
+        path = self.path(key, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_npz_atomic(path, arrays)
+        self._touch(path, os.path.getsize(path))
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def cached(self, key, name, compute):
+        # arrays stored under (key, name), computed with compute() and stored on a miss
+        arrays = self.get(key, name)
+        if arrays is None:
+            arrays = compute()
+            self.put(key, name, arrays)
+        return arrays
+
+    def nbytes(self):
+        return self._total
+
+    def _touch(self, path, size):
+        # record path as the most recently used entry
+        self._forget(path)
+        self._index[path] = size
+        self._total += size
+
+    def _forget(self, path):
+        size = self._index.pop(path, None)
+        if size is not None:
+            self._total -= size
+
+    def _entries(self):
+        # (modification time, size, path) of every entry on disk
+        entries = []
+        for graph_dir in os.scandir(self.directory):
+            if not graph_dir.is_dir():
+                continue
+            for entry in os.scandir(graph_dir.path):
+                if entry.name.endswith('.npz') and '.tmp.' not in entry.name:
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        # remove least recently used entries until the cache fits in max_bytes
+        while self._index and self._total > self.max_bytes:
+            path, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            count('result_cache_evictions')
+            _remove_if_empty(os.path.dirname(path))
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+        self._index.clear()
+        self._total = 0
+        for graph_dir in os.scandir(self.directory):
+            if graph_dir.is_dir():
+                _remove_if_empty(graph_dir.path)
+
+
+def _remove_if_empty(directory):
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
@@ -0,0 +1,117 @@
+import numpy as np
+import scipy.sparse as sp
+
+# Columnar curvature results.
+#
+# A VertexCurvature holds one float array with a value per vertex and an EdgeCurvature holds
+# the arrays (edges_u, edges_v, values) with edges_u < edges_v. Both keep the arrays as
+# they come out of the computation and only build Python objects on request:
+# - columns() gives the arrays themselves, to_npz writes them as they are, and to_arrow
+#   wraps them in a pyarrow Table without copying (to_parquet writes that table);
+# - tolist(), to_dict(), to_poset_dict() and to_sparse() give the legacy formats.
+# pyarrow is only needed for to_arrow and to_parquet.
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Arrow and Parquet export need pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+class _Columns:
+    __slots__ = ()
+
+    def to_npz(self, path):
+        # write the columns to an uncompressed .npz file
+        np.savez(path, **self.columns())
+
+    def to_arrow(self):
+        # returns: table (pyarrow Table) sharing the memory of the columns
+        pa = _pyarrow()
+        return pa.table({name: pa.array(col) for name, col in self.columns().items()})
+
+    def to_parquet(self, path, **kwargs):
+        # kwargs are passed on to pyarrow.parquet.write_table (compression, ...)
+        _pyarrow()
+        import pyarrow.parquet as pq
+        pq.write_table(self.to_arrow(), path, **kwargs)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class VertexCurvature(_Columns):
+    # values (numpy array) curvature at each vertex 0, ..., n - 1
+    __slots__ = ('values',)
+
+    def __init__(self, values):
+        self.values = np.ascontiguousarray(values, dtype=float)
+
+    def columns(self):
+        return {'vertex': np.arange(len(self.values)), 'value': self.values}
+
+    @classmethod
+    def load_npz(cls, path):
+        with np.load(path) as f:
+            return cls(f['value'])
+
+    def tolist(self):
+        # legacy format: list of floats
+        return self.values.tolist()
+
+
+class EdgeCurvature(_Columns):
+    # n_verts (int) number of vertices of the graph
+    # edges_u, edges_v (numpy arrays) the edges, edges_u < edges_v, in lexicographic order
+    # values (numpy array) curvature of each edge
+    __slots__ = ('n_verts', 'edges_u', 'edges_v', 'values')
+
+    def __init__(self, n_verts, edges_u, edges_v, values):
+        self.n_verts = n_verts
+        # contiguous, so to_arrow can wrap them as they are (columns of an edge array are strided views)
+        self.edges_u = np.ascontiguousarray(edges_u, dtype=np.int64)
+        self.edges_v = np.ascontiguousarray(edges_v, dtype=np.int64)
+        self.values = np.ascontiguousarray(values)
+
+    @classmethod
+    def from_sparse(cls, M):
+        # input: M (scipy sparse n x n matrix) symmetric, nonzero only on the edges (e.g. link_res_curvature)
+        upper = sp.triu(M, k=1).tocsr()
+        upper.sort_indices()
+        rows = np.repeat(np.arange(upper.shape[0]), np.diff(upper.indptr))
+        return cls(upper.shape[0], rows, upper.indices, upper.data)
+
+    def columns(self):
+        return {'u': self.edges_u, 'v': self.edges_v, 'value': self.values}
+
+    @classmethod
+    def load_npz(cls, path, n_verts=None):
+        # n_verts defaults to one more than the largest vertex on an edge
+        with np.load(path) as f:
+            edges_u, edges_v, values = f['u'], f['v'], f['value']
+        if n_verts is None:
+            n_verts = int(edges_v.max()) + 1 if len(edges_v) else 0
+        return cls(n_verts, edges_u, edges_v, values)
+
+    def tolist(self):
+        # list of the values, in the order of the edges
+        return self.values.tolist()
+
+    def to_dict(self):
+        # dictionary (u, v) -> value
+        return dict(zip(zip(self.edges_u.tolist(), self.edges_v.tolist()), self.values.tolist()))
+
+    def to_poset_dict(self):
+        # legacy format of forman: keys are the positions n + 1, n + 2, ... of the edges in the
+        # poset of vertices, edges and faces
+        index_first_edge = self.n_verts + 1
+        return dict(zip(range(index_first_edge, index_first_edge + len(self.values)), self.values.tolist()))
+
+    def to_sparse(self):
+        # symmetric scipy csr matrix with the values on the edges (the format of link_res_curvature)
+        rows = np.concatenate([self.edges_u, self.edges_v])
+        cols = np.concatenate([self.edges_v, self.edges_u])
+        n = self.n_verts
+        return sp.csr_matrix((np.concatenate([self.values, self.values]), (rows, cols)), shape=(n, n))
@@ -1,28 +1,67 @@
 import numpy as np
+import scipy.sparse as sp
 
-def res_curvature(A):
-  # input: A (list) Adjacency Matrix (can be weighted if you want)
+from Effective_Resistance_Curvatures.out_of_core_resistance import out_of_core_res_curvature
+from Effective_Resistance_Curvatures.matrix_free_resistance import matrix_free_res_curvature
+from Effective_Resistance_Curvatures.dense_resistance import lean_res_curvature
+from Curvature_Results.curvature_results import VertexCurvature
+from Instrumentation.instrumentation import phase, count
+
+def res_curvature(A, sparse=False, solver='direct', eps=None, seed=None, out_of_core=False, directory=None, block_size=256, dtype=None):
+  # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted if you want)
+  # sparse (bool) use sparse Laplacian solves, never forming Omega or L+ (the graph must be connected),
+  # see matrix_free_resistance; exact (eps=None) it costs n solves, which on graphs whose factor fills in is
+  # slower than the dense default, so use it for graphs too large for n x n arrays
+  # solver, eps, seed - options of the sparse mode (eps=None is exact, otherwise the edge resistances are sketched)
+  # out_of_core (bool) keep Omega in a memory-mapped file and solve iteratively (the graph must be connected),
+  # see out_of_core_resistance; directory is where the n^2 * 8 byte file goes
+  # block_size (int) right-hand sides solved together in the sparse and out of core modes, bounds memory by n * block_size
+  # dtype (numpy dtype, e.g. np.float32) compute Omega in one in-place n x n buffer of this dtype (the graph must be
+  # connected), see dense_resistance; None keeps the float64 pseudo-inverse
   # returns: resistance_curvature (list) Steinerberger effective resistance curvature at each vertex
+  # (res_curvature_result gives the same values as a VertexCurvature)
+  return res_curvature_result(A, sparse, solver, eps, seed, out_of_core, directory, block_size, dtype).tolist()
+
+def res_curvature_result(A, sparse=False, solver='direct', eps=None, seed=None, out_of_core=False, directory=None, block_size=256, dtype=None):
+  # input: as in res_curvature
+  # returns: resistance_curvature (VertexCurvature) Steinerberger effective resistance curvature at each vertex,
+  # see Curvature_Results.curvature_results
+
+  if sparse:
+      return VertexCurvature(matrix_free_res_curvature(A, solver, eps, seed, block_size=block_size))
+  if out_of_core:
+      return VertexCurvature(out_of_core_res_curvature(A, directory, solver, block_size))
+  if dtype is not None:
+      return VertexCurvature(lean_res_curvature(A, dtype))
 
   # construct laplacian
-  n = len(A[0])
-  A_np = np.array(A)
+  with phase('laplacian'):
+    A_np = A.toarray() if sp.issparse(A) else np.array(A)
+    n = len(A_np)
 
-  ones_vector = np.ones(n)
-  Degree = np.diag(ones_vector @ A_np)
-  L = Degree - A_np
+    ones_vector = np.ones(n)
+    Degree = np.diag(ones_vector @ A_np)
+    L = Degree - A_np
 
   # construct Gamma
-  GammaInverse = np.linalg.pinv(L)
+  with phase('pinv'):
+    GammaInverse = np.linalg.pinv(L)
+  count('pinv')
 
   # construct effective resistance matrix Omega
-  Omega = np.empty([n, n])
+  with phase('omega'):
+    Gamma_diag = np.diag(GammaInverse)
+    Omega = Gamma_diag[:, None] + Gamma_diag[None, :] - 2 * GammaInverse
+
+  return VertexCurvature(res_curvature_from_omega(Omega))
 
-  for i in range(n):
-    for j in range(n):
-        Omega[i][j] = GammaInverse[i][i] + GammaInverse[j][j] - 2 * GammaInverse[i][j]
+def res_curvature_from_omega(Omega):
+  # input: Omega (numpy array) effective resistance matrix
+  # returns: resistance_curvature (numpy array) solution x of Omega x = 1
 
   # compute effective resistance curvature vector
-  resistance_curvature = np.linalg.solve(Omega, ones_vector)
+  with phase('curvature'):
+    ones_vector = np.ones(len(Omega))
+    resistance_curvature = np.linalg.solve(Omega, ones_vector)
 
-  return resistance_curvature.tolist()
+  return resistance_curvature
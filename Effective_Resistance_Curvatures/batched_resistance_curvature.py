@@ -0,0 +1,107 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from Instrumentation.instrumentation import phase, count
+
+# Resistance curvatures of many graphs with the same number of vertices at once.
+# The adjacency matrices are stacked into a (B, n, n) array and every step uses
+# NumPy's batched linear algebra, so small graphs do not pay Python/LAPACK call
+# overhead one at a time.
+#
+# For connected graphs L+ = (L + J/n)^-1 - J/n (J the all ones matrix), which is a
+# batched inverse instead of a batched SVD. Connectivity is checked for the whole stack at
+# once (components of the block diagonal graph), and the disconnected graphs go through pinv;
+# pass connected=False to use pinv for every graph.
+
+
+def batch_connected(A_batch):
+    # input: A_batch (B x n x n array) stacked Adjacency Matrices
+    # returns: connected (B bool array) whether each graph is connected
+    B, n = A_batch.shape[0], A_batch.shape[-1]
+    b, i, j = np.nonzero(A_batch)
+    stacked = sp.csr_matrix((np.ones(len(b)), (b * n + i, b * n + j)), shape=(B * n, B * n))
+    _, labels = connected_components(stacked, directed=False)
+    # labels are numbered in order of first vertex, so graph b has labels[b * n] .. labels[b * n + n - 1]
+    per_graph = labels.reshape(B, n)
+    return per_graph.max(axis=1) == per_graph.min(axis=1)
+
+
+def batch_pinv_laplacian(A_batch, connected=True):
+    # input: A_batch (B x n x n array) stacked Adjacency Matrices (can be weighted)
+    # connected (bool) use the inverse of L + J/n for the graphs that are connected
+    # returns: L_inv (B x n x n array) pseudo-inverse of each Laplacian
+    with phase('laplacian'):
+        A_np = np.asarray(A_batch, dtype=float)
+        n = A_np.shape[-1]
+        L = -A_np.copy()
+        idx = np.arange(n)
+        L[:, idx, idx] += np.sum(A_np, axis=2)
+    count('pinv', len(L))
+    with phase('pinv'):
+        if not connected:
+            return np.linalg.pinv(L, hermitian=True)
+        ok = batch_connected(A_np)
+        if ok.all():
+            L += 1 / n
+            L_inv = np.linalg.inv(L)
+            L_inv -= 1 / n
+            return L_inv
+        # L + J/n is singular for a disconnected graph
+        count('pinv_fallbacks', int((~ok).sum()))
+        L_inv = np.empty_like(L)
+        L_inv[~ok] = np.linalg.pinv(L[~ok], hermitian=True)
+        L_inv[ok] = np.linalg.inv(L[ok] + 1 / n) - 1 / n
+    return L_inv
+
+
+def batch_omega(A_batch, connected=True):
+    # returns: Omega (B x n x n array) effective resistance matrix of each graph
+    L_inv = batch_pinv_laplacian(A_batch, connected)
+    with phase('omega'):
+        L_inv_diag = np.diagonal(L_inv, axis1=1, axis2=2)
+        return L_inv_diag[:, :, None] + L_inv_diag[:, None, :] - 2 * L_inv
+
+
+def batch_res_curvature(A_batch, connected=True):
+    # input: A_batch (B x n x n array) stacked Adjacency Matrices (can be weighted)
+    # returns: resistance_curvature (B x n array) Steinerberger effective resistance curvature at each vertex of each graph
+    #          (nan for a graph whose Omega is singular)
+    Omega = batch_omega(A_batch, connected)
+    with phase('curvature'):
+        ones = np.ones(Omega.shape[:2] + (1,))
+        try:
+            return np.linalg.solve(Omega, ones)[:, :, 0]
+        except np.linalg.LinAlgError:
+            pass
+        # one singular Omega fails the whole stack: solve the graphs one at a time
+        count('solve_fallbacks')
+        curvature = np.full(Omega.shape[:2], np.nan)
+        for b in range(len(Omega)):
+            try:
+                curvature[b] = np.linalg.solve(Omega[b], ones[b])[:, 0]
+            except np.linalg.LinAlgError:
+                pass
+        return curvature
+
+
+def batch_node_res_curvature(A_batch, connected=True):
+    # input: A_batch (B x n x n array) stacked Adjacency Matrices (can be weighted)
+    # returns: node_curvature (B x n array) node resistance curvature at each vertex of each graph
+    Omega = batch_omega(A_batch, connected)
+    with phase('curvature'):
+        return 1 - 0.5 * np.sum(Omega * np.asarray(A_batch), axis=2)
+
+
+def batch_link_res_curvature(A_batch, connected=True):
+    # input: A_batch (B x n x n array) stacked Adjacency Matrices (can be weighted)
+    # returns: link_curvature (B x n x n array) link curvature of each edge of each graph, 0 off the edges
+    A_np = np.asarray(A_batch)
+    Omega = batch_omega(A_np, connected)
+    with phase('curvature'):
+        node_curvature = 1 - 0.5 * np.sum(Omega * A_np, axis=2)
+        on_edge = A_np != 0
+        link_curvature = np.zeros(A_np.shape)
+        numerator = 2 * (node_curvature[:, :, None] + node_curvature[:, None, :])
+        np.divide(numerator, Omega, out=link_curvature, where=on_edge)
+    return link_curvature
@@ -0,0 +1,155 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature_result
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature_result
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature
+from Effective_Resistance_Curvatures.batched_resistance_curvature import (
+    batch_res_curvature, batch_node_res_curvature, batch_link_res_curvature,
+)
+from Instrumentation.instrumentation import phase, count
+
+# Resistance curvatures of a graph with several connected components.
+#
+# Vertices in different components are at infinite effective resistance, so every
+# curvature is computed on each component separately: the node and link curvatures are
+# local anyway, and the DOS curvature solves Omega x = 1 within each component.
+# pinv(L) of the whole graph would mix the components instead.
+#
+# The components come from one linear-time pass (scipy.sparse.csgraph). Components with at
+# most `small` vertices are stacked by size and go through batched_resistance_curvature,
+# larger ones through the usual functions (dense or sparse). The pieces can run on a thread
+# or process pool and are stitched back in the original vertex order.
+# An isolated vertex has node curvature 1, no links, and an undefined (nan) DOS curvature.
+
+CURVATURES = ('dos', 'node', 'link')
+
+
+def split_components(A):
+    # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted)
+    # returns:
+    # members (list of numpy arrays) - the vertices of each component, in increasing order
+    # blocks (list of scipy csr matrices) - the Adjacency Matrix of each component, in the order of its members
+    A_coo = sp.coo_matrix(A if sp.issparse(A) else np.asarray(A))
+    n = A_coo.shape[0]
+    n_comp, labels = connected_components(A_coo.tocsr(), directed=False)
+
+    # members of each component and the position of each vertex within its component
+    order = np.argsort(labels, kind='stable')
+    sizes = np.bincount(labels, minlength=n_comp)
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    local = np.empty(n, dtype=np.int64)
+    local[order] = np.arange(n) - np.repeat(starts[:-1], sizes)
+
+    # entries of A grouped by component
+    by_comp = np.argsort(labels[A_coo.row], kind='stable')
+    entry_starts = np.concatenate([[0], np.cumsum(np.bincount(labels[A_coo.row], minlength=n_comp))])
+    rows = local[A_coo.row[by_comp]]
+    cols = local[A_coo.col[by_comp]]
+    data = A_coo.data[by_comp]
+
+    members = []
+    blocks = []
+    for c in range(n_comp):
+        lo, hi = entry_starts[c], entry_starts[c + 1]
+        s = sizes[c]
+        members.append(order[starts[c]:starts[c + 1]])
+        blocks.append(sp.csr_matrix((data[lo:hi], (rows[lo:hi], cols[lo:hi])), shape=(s, s)))
+    return members, blocks
+
+
+def _run_single(curvature, block, sparse, solver):
+    if curvature == 'dos':
+        return res_curvature_result(block, sparse=sparse, solver=solver).values
+    if curvature == 'node':
+        return node_res_curvature_result(block, sparse=sparse, solver=solver).values
+    link = link_res_curvature(block, sparse=sparse, solver=solver).tocoo()
+    return link.row, link.col, link.data
+
+
+def _run_batch(curvature, A_stack):
+    if curvature == 'dos':
+        return batch_res_curvature(A_stack)
+    if curvature == 'node':
+        return batch_node_res_curvature(A_stack)
+    link = batch_link_res_curvature(A_stack)
+    g, i, j = np.nonzero(A_stack)
+    return g, i, j, link[g, i, j]
+
+
+def _run_task(task):
+    # task: ('single', curvature, block, sparse, solver) or ('batch', curvature, A_stack)
+    if task[0] == 'single':
+        return _run_single(*task[1:])
+    return _run_batch(*task[1:])
+
+
+def component_res_curvature(A, curvature='node', sparse=False, solver='direct', small=64, batch_size=256, pool=None, workers=None):
+    # input:
+    # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted), possibly disconnected
+    # curvature (string) 'dos', 'node' or 'link'
+    # sparse, solver - how components larger than `small` are solved, see res_curvature / node_res_curvature / link_res_curvature
+    # small (int) components with at most this many vertices are batched with the other components of their size
+    # batch_size (int) largest number of components in one batch
+    # pool (string or None) None to run in this process, 'thread' or 'process' to run the components on a pool
+    # workers (int or None) size of the pool (the executor's default if None)
+    # returns:
+    # resistance_curvature or node_curvature (list) for 'dos' and 'node', at each vertex
+    # link_curvature (scipy sparse n x n matrix) for 'link', nonzero only on edges
+    if curvature not in CURVATURES:
+        raise ValueError("curvature must be one of {}".format(CURVATURES))
+    n = A.shape[0] if sp.issparse(A) else len(A)
+
+    with phase('components'):
+        members, blocks = split_components(A)
+    count('components', len(members))
+
+    tasks = []
+    task_members = []
+    by_size = {}
+    for verts, block in zip(members, blocks):
+        if len(verts) == 1:
+            continue
+        if len(verts) <= small:
+            by_size.setdefault(len(verts), []).append((verts, block))
+        else:
+            tasks.append(('single', curvature, block, sparse, solver))
+            task_members.append(verts)
+    for _, group in sorted(by_size.items()):
+        for start in range(0, len(group), batch_size):
+            chunk = group[start:start + batch_size]
+            tasks.append(('batch', curvature, np.stack([block.toarray() for _, block in chunk])))
+            task_members.append(np.stack([verts for verts, _ in chunk]))
+
+    with phase('component_solves'):
+        if pool is None:
+            results = [_run_task(task) for task in tasks]
+        else:
+            executor = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}[pool]
+            with executor(workers) as ex:
+                results = list(ex.map(_run_task, tasks))
+
+    # stitch the pieces back in the original vertex order
+    if curvature != 'link':
+        values = np.full(n, np.nan if curvature == 'dos' else 1.0)
+        for verts, result in zip(task_members, results):
+            values[verts] = result
+        return values.tolist()
+
+    rows, cols, data = [], [], []
+    for task, verts, result in zip(tasks, task_members, results):
+        if task[0] == 'single':
+            i, j, link = result
+            rows.append(verts[i])
+            cols.append(verts[j])
+        else:
+            g, i, j, link = result
+            rows.append(verts[g, i])
+            cols.append(verts[g, j])
+        data.append(link)
+    if not data:
+        return sp.csr_matrix((n, n))
+    return sp.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(n, n))
@@ -0,0 +1,130 @@
+import numpy as np
+import scipy.linalg as sla
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.sparse_resistance import check_connected
+from Instrumentation.instrumentation import phase, count
+
+# Dense resistance curvatures with a chosen precision and one n x n working buffer.
+#
+# The default dense path allocates Degree, L, pinv(L) (plus its SVD), Omega and Omega * A,
+# all float64. Here:
+# - the adjacency is kept compact, as a bool array when every weight is 1 (n^2 bytes);
+# - L + J/n is built directly in an n x n buffer of the compute dtype (float32 or float64),
+#   inverted in place (LU), and shifted to L+ = (L + J/n)^-1 - J/n, which needs a connected graph
+#   (ValueError otherwise);
+# - Omega = d 1^T + 1 d^T - 2 L+ overwrites the same buffer;
+# - node curvature sums Omega over the edges only, the DOS curvature solves Omega x = 1 in place
+#   (symmetric indefinite LDL^T).
+# Peak memory is the compact adjacency plus one n x n buffer, e.g. 5 n^2 bytes with float32
+# instead of about 48 n^2. precision_report measures what a dtype costs against float64.
+
+
+def compact_adjacency(A):
+    # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted)
+    # returns: A_c (n x n numpy array) bool if every nonzero weight is 1, float64 weights otherwise
+    if sp.issparse(A):
+        # scatter the nonzeros directly, never going through a dense float64 copy
+        A = sp.coo_matrix(A)
+        A.sum_duplicates()
+        nonzero = A.data != 0
+        unweighted = np.all(A.data[nonzero] == 1)
+        A_c = np.zeros(A.shape, dtype=bool if unweighted else np.float64)
+        A_c[A.row[nonzero], A.col[nonzero]] = True if unweighted else A.data[nonzero]
+        return A_c
+    A = np.asarray(A)
+    if A.dtype == bool:
+        return A
+    if np.all((A == 0) | (A == 1)):
+        return A != 0
+    return A.astype(np.float64, copy=False)
+
+
+def omega_in_place(A_c, dtype=np.float32):
+    # input: A_c (n x n array) compact Adjacency Matrix of a connected graph, dtype - compute precision
+    # returns: Omega (n x n array of dtype) effective resistance matrix, the only n x n buffer allocated
+    n = len(A_c)
+    # L + J/n is singular for a disconnected graph, and the unchecked in-place inverse below
+    # must never see a singular matrix
+    check_connected(A_c)
+    with phase('laplacian'):
+        buf = np.empty((n, n), dtype=dtype)
+        np.copyto(buf, A_c, casting='unsafe')
+        np.negative(buf, out=buf)
+        diag = np.einsum('ii->i', buf)
+        diag += A_c.sum(axis=1, dtype=dtype)
+        buf += buf.dtype.type(1) / n
+
+    with phase('pinv'):
+        # L + J/n is symmetric: its transpose is a Fortran-ordered view LAPACK can overwrite
+        buf = sla.inv(buf.T, overwrite_a=True, check_finite=False).T
+        buf -= buf.dtype.type(1) / n
+    count('pinv')
+
+    with phase('omega'):
+        d = np.diag(buf).copy()
+        buf *= -2
+        buf += d[:, None]
+        buf += d[None, :]
+    return buf
+
+
+def _node_curvature(A_c, Omega):
+    # 1 - 1/2 sum_j A[i, j] Omega[i, j], summed over the edges only
+    i, j = np.nonzero(A_c)
+    weights = A_c[i, j].astype(Omega.dtype)
+    return 1 - 0.5 * np.bincount(i, weights * Omega[i, j], minlength=len(A_c))
+
+
+def lean_res_curvature(A, dtype=np.float32):
+    # returns: resistance_curvature (numpy array) solution x of Omega x = 1, see res_curvature
+    Omega = omega_in_place(compact_adjacency(A), dtype)
+    with phase('curvature'):
+        return sla.solve(Omega, np.ones(len(Omega), dtype=Omega.dtype), assume_a='sym', overwrite_a=True, check_finite=False)
+
+
+def lean_node_res_curvature(A, dtype=np.float32):
+    # returns: node_curvature (numpy array) node resistance curvature at each vertex, see node_res_curvature
+    A_c = compact_adjacency(A)
+    Omega = omega_in_place(A_c, dtype)
+    with phase('node_curvature'):
+        return _node_curvature(A_c, Omega)
+
+
+def lean_link_res_curvature(A, dtype=np.float32):
+    # returns: link_curvature (scipy sparse n x n matrix) link curvature of each edge, see link_res_curvature
+    from Effective_Resistance_Curvatures.link_resistance_curvature import link_curvature_from_omega
+    A_c = compact_adjacency(A)
+    Omega = omega_in_place(A_c, dtype)
+    with phase('node_curvature'):
+        node_curvature = _node_curvature(A_c, Omega)
+    return link_curvature_from_omega(A_c, Omega, node_curvature)
+
+
+def precision_report(A, dtype=np.float32):
+    # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix of a connected graph, dtype - precision to assess
+    # returns: report (dictionary) for 'dos', 'node' and 'link': the largest absolute and relative
+    #          error of the dtype results against the default float64 functions, and 'buffer_bytes',
+    #          the size of the n x n working buffer in dtype
+    from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature
+    from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+    from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature
+
+    # the lean functions are called one at a time, so only one n x n buffer of dtype is alive
+    i, j = np.nonzero(compact_adjacency(A))
+    pairs = {
+        'dos': (res_curvature(A), lean_res_curvature(A, dtype)),
+        'node': (node_res_curvature(A), lean_node_res_curvature(A, dtype)),
+        'link': (link_res_curvature(A)[i, j], lean_link_res_curvature(A, dtype)[i, j]),
+    }
+    report = {}
+    for name, (ref, approx) in pairs.items():
+        ref = np.asarray(ref, dtype=np.float64).ravel()
+        err = np.abs(np.asarray(approx, dtype=np.float64).ravel() - ref)
+        report[name] = {
+            'max_abs_error': float(err.max()) if len(err) else 0.0,
+            'max_rel_error': float((err / np.maximum(np.abs(ref), np.finfo(np.float64).tiny)).max()) if len(err) else 0.0,
+        }
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    report['buffer_bytes'] = n * n * np.dtype(dtype).itemsize
+    return report
@@ -0,0 +1,400 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.sparse_resistance import edge_list, sparse_laplacian, LaplacianSolver, row_ranges, lplus_columns
+from Instrumentation.instrumentation import phase, count
+
+# The most negative node or link resistance curvatures of a connected graph, without
+# computing every vertex or edge.
+#
+# Every edge resistance is bracketed by cheap bounds:
+# - Omega[u, v] >= 1 / (w_uv + a b / (a + b)) with a = D_u - w_uv, b = D_v - w_uv, D the weighted
+#   degree: shorting every other vertex together only lowers the resistance (Dirichlet principle);
+# - Omega[u, v] <= 1 / (w_uv + (W^2)[u, v] / (2 w_max)): the edge and the 2-paths through the
+#   common neighbors are edge-disjoint paths in parallel (Rayleigh monotonicity), and the
+#   conductance w_uk w_kv / (w_uk + w_kv) of a 2-path is at least w_uk w_kv / (2 w_max);
+# - both are tightened on a ball B around each vertex i: the resistances from i to its
+#   neighbors in B with the edges leaving B cut are upper bounds, those in B with everything
+#   outside shorted into one vertex are lower bounds. The balls of many vertices are padded
+#   to a common size and solved as one stack of small grounded Laplacians.
+# Since p_i = 1 - 1/2 sum_j w_ij Omega[i, j] and kappa_ij = 2 (p_i + p_j) / Omega[i, j], these
+# give an interval for every node and link curvature.
+#
+# A query keeps the candidates whose interval can still reach the answer. While some of them
+# have balls that can grow, it doubles their radius (up to max_radius, or until the ball would
+# exceed max_ball vertices) and prunes again; the bounds converge quickly as the balls grow.
+# Only then are the survivors evaluated exactly, in order of lower bound and a batch at a time.
+# An exact value needs the columns of L+ of the closed neighborhood of the vertex (of both
+# endpoints for a link); the columns come from sparse Laplacian solves and are kept, so the
+# queries on one CurvatureQuery share them. With max_solves the search stops before solving
+# more columns than that; the result then tells which answers are certain.
+
+
+def _lookup(keys, queries):
+    # positions of queries in the sorted array keys, -1 where absent
+    if len(keys) == 0:
+        return np.full(len(queries), -1)
+    pos = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+    return np.where(keys[pos] == queries, pos, -1)
+
+
+class QueryResult:
+    # index (numpy array) vertices, or edge numbers in the order of edge_list, ordered by value
+    # edges_u, edges_v (numpy arrays or None) endpoints of the edges, for link queries
+    # values (numpy array) exact curvature, nan where it was not evaluated
+    # lower, upper (numpy arrays) bounds on the curvature (equal to the value once evaluated)
+    # certain (numpy array of bools) whether each answer is certainly part of the true answer
+    # complete (bool) whether the answer holds exactly the true vertices (or edges)
+    # n_solves (int) Laplacian solves done by this query
+
+    def __init__(self, index, edges_u, edges_v, values, lower, upper, certain, complete, n_solves):
+        self.index = index
+        self.edges_u = edges_u
+        self.edges_v = edges_v
+        self.values = values
+        self.lower = lower
+        self.upper = upper
+        self.certain = certain
+        self.complete = complete
+        self.n_solves = n_solves
+
+    def __len__(self):
+        return len(self.index)
+
+    def to_dict(self):
+        # returns: dictionary vertex (or (u, v)) -> value, nan where not evaluated
+        if self.edges_u is None:
+            keys = self.index.tolist()
+        else:
+            keys = list(zip(self.edges_u.tolist(), self.edges_v.tolist()))
+        return dict(zip(keys, self.values.tolist()))
+
+
+class CurvatureQuery:
+
+    def __init__(self, A, solver='direct', block_size=64, radius=2, max_radius=16, max_ball=128, stack_entries=2 ** 22):
+        # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted) of a connected graph
+        # solver (string) 'direct' or 'cg', see sparse_resistance.LaplacianSolver
+        # block_size (int) columns of L+ solved together
+        # radius (int) radius of the balls every vertex starts with (0 uses the closed forms only)
+        # max_radius (int) largest radius the balls of the candidates are grown to
+        # max_ball (int) largest ball; a ball stops growing before it exceeds this many vertices
+        # stack_entries (int) bound on the size of one stack of padded ball Laplacians
+        self.n = A.shape[0] if sp.issparse(A) else len(A)
+        self.block_size = block_size
+        self.max_radius = max_radius
+        self.max_ball = max_ball
+        self.stack_entries = stack_entries
+        with phase('laplacian'):
+            self.edges_u, self.edges_v, self.weights = edge_list(A)
+            L = sparse_laplacian(self.n, self.edges_u, self.edges_v, self.weights)
+        self.lap_solver = LaplacianSolver(L, solver)
+
+        # vertex -> incident edges, and the neighbors at the other end
+        E = len(self.edges_u)
+        ends = np.concatenate([self.edges_u, self.edges_v])
+        order = np.argsort(ends, kind='stable')
+        self.inc_ptr = np.concatenate([[0], np.cumsum(np.bincount(ends, minlength=self.n))])
+        self.inc_edge = np.tile(np.arange(E), 2)[order]
+        self.inc_other = np.concatenate([self.edges_v, self.edges_u])[order]
+        self.degree = np.bincount(ends, np.concatenate([self.weights, self.weights]), minlength=self.n)
+        self.W = sp.csr_matrix((np.concatenate([self.weights, self.weights]), (ends, np.concatenate([self.edges_v, self.edges_u]))),
+                               shape=(self.n, self.n))
+        self.W.sort_indices()
+
+        # known entries of L+: the diagonal and L+[u, v] on the edges
+        self.lplus_diag = np.full(self.n, np.nan)
+        self.lplus_uv = np.full(E, np.nan)
+        self.solved = np.zeros(self.n, dtype=bool)
+
+        # radius of the ball each vertex's bounds come from, and whether it can still grow
+        self.ball_radius = np.zeros(self.n, dtype=np.int64)
+        self.ball_final = np.zeros(self.n, dtype=bool)
+
+        with phase('curvature_bounds'):
+            self.omega_lower, self.omega_upper = self._omega_bounds()
+            if radius > 0:
+                self._refine(np.arange(self.n), radius)
+            else:
+                self.ball_final[:] = True
+            self._node_bounds()
+
+    def _omega_bounds(self):
+        n, u, v, w = self.n, self.edges_u, self.edges_v, self.weights
+        # potential 1 at u, 0 at v and the best constant alpha elsewhere has energy w_uv + a b / (a + b)
+        a, b = self.degree[u] - w, self.degree[v] - w
+        shorted = np.divide(a * b, a + b, out=np.zeros(len(w)), where=(a + b) > 0)
+        lower = 1 / (w + shorted)
+
+        W = self.W
+        # (W^2)[u, v] on the edges: adding the 0/1 pattern of the edges keeps one entry per edge,
+        # in the lexicographic order of edge_list
+        pattern = sp.csr_matrix((np.ones(len(u)), (u, v)), shape=(n, n))
+        on_edges = ((W @ W).multiply(pattern) + pattern).tocsr()
+        on_edges.sort_indices()
+        paths = on_edges.data - 1
+        upper = 1 / (w + paths / (2 * w.max())) if len(w) else np.zeros(0)
+        return lower, upper
+
+    def _node_bounds(self):
+        n, u, v, w = self.n, self.edges_u, self.edges_v, self.weights
+        # p_i is decreasing in each Omega[i, j]
+        def p(omega):
+            half = 0.5 * w * omega
+            return 1 - np.bincount(u, half, minlength=n) - np.bincount(v, half, minlength=n)
+        self.node_lower, self.node_upper = p(self.omega_upper), p(self.omega_lower)
+
+    def _balls(self, centers, radius):
+        # returns: balls (csr matrix, a row of vertices per center, sorted), grown one layer at a
+        # time up to radius; a ball stops before exceeding max_ball vertices
+        k = len(centers)
+        reach = (self.W != 0).astype(np.int32) + sp.identity(self.n, dtype=np.int32, format='csr')
+        balls = sp.csr_matrix((np.ones(k, dtype=np.int32), (np.arange(k), centers)), shape=(k, self.n))
+        growing = np.ones(k, dtype=bool)
+        reached = np.zeros(k, dtype=np.int64)
+        for _ in range(radius):
+            if not growing.any():
+                break
+            grown = (balls @ reach).tocsr()
+            grown.data[:] = 1
+            sizes = np.diff(grown.indptr)
+            # stop at the current ball when the next would be too large, or is the whole component
+            take = growing & (sizes <= self.max_ball) & (sizes > np.diff(balls.indptr))
+            growing &= take
+            reached += take
+            balls = (sp.diags(take.astype(np.int32), dtype=np.int32) @ grown + sp.diags((~take).astype(np.int32), dtype=np.int32) @ balls).tocsr()
+        balls.sort_indices()
+        return balls, reached, growing
+
+    def _refine(self, centers, radius):
+        # tighten the bounds on the edges at each center with its ball of the given radius
+        balls, reached, growing = self._balls(centers, radius)
+        self.ball_radius[centers] = np.maximum(self.ball_radius[centers], reached)
+        # a ball that stopped early (too large, or the whole component) or reached max_radius is final
+        self.ball_final[centers] |= ~growing | (reached >= self.max_radius)
+
+        # vertices whose closed neighborhood already exceeds max_ball keep the closed forms
+        usable = np.flatnonzero(reached > 0)
+        order = usable[np.argsort(np.diff(balls.indptr)[usable], kind='stable')]
+        padded = np.diff(balls.indptr)[order] + 1
+        start = 0
+        while start < len(order):
+            # a stack of balls of similar sizes, padded to the largest (+ 1 for the shorted vertex)
+            stop = np.searchsorted(padded, 1.25 * padded[start], side='right')
+            stop = min(stop, start + max(1, self.stack_entries // padded[stop - 1] ** 2))
+            self._solve_balls(centers[order[start:stop]], balls, order[start:stop])
+            start = stop
+        count('local_bounds', len(usable))
+
+    def _solve_balls(self, centers, balls, rows):
+        # resistances from each center to its neighbors, in its ball with the outside cut and shorted
+        n, W = self.n, self.W
+        k = len(centers)
+        m = balls.indptr[rows + 1] - balls.indptr[rows]
+        S = m.max()
+        size = S + 1
+        members = balls.indices[row_ranges(balls.indptr, rows)]
+        ball_of = np.repeat(np.arange(k), m)
+        pos_of = np.arange(len(members)) - np.repeat(np.cumsum(m) - m, m)
+        keys = ball_of.astype(np.int64) * n + members
+
+        # edges of W from the members: inside the ball or leaving it
+        at = row_ranges(W.indptr, members)
+        n_at = W.indptr[members + 1] - W.indptr[members]
+        a_ball, a_pos = np.repeat(ball_of, n_at), np.repeat(pos_of, n_at)
+        w = W.data[at]
+        loc = _lookup(keys, a_ball.astype(np.int64) * n + W.indices[at])
+        inside = loc >= 0
+        b_pos = pos_of[loc[inside]]
+        inner = np.bincount(a_ball * size + a_pos, w * inside, minlength=k * size).reshape(k, size)
+        outside = np.bincount(a_ball * size + a_pos, w * ~inside, minlength=k * size).reshape(k, size)
+
+        diag = np.arange(size)
+        L_cut = np.zeros((k, size, size))
+        L_cut[a_ball[inside], a_pos[inside], b_pos] = -w[inside]
+        L_cut[:, diag, diag] += inner
+        # every vertex outside the ball merged into the vertex at position S
+        L_short = L_cut.copy()
+        L_short[:, diag, diag] += outside
+        L_short[:, :, S] -= outside
+        L_short[:, S, :] -= outside
+        L_short[:, S, S] = outside.sum(axis=1)
+
+        # ground the center: removing its row and column leaves a positive definite system whose
+        # inverse has Omega[center, j] on the diagonal; padding (and an unused shorted vertex) gets a 1
+        center_pos = pos_of[_lookup(keys, np.arange(k, dtype=np.int64) * n + centers)]
+        nbr_at = row_ranges(self.inc_ptr, centers)
+        d = self.inc_ptr[centers + 1] - self.inc_ptr[centers]
+        nbr_ball = np.repeat(np.arange(k), d)
+        nbr_col = np.arange(len(nbr_at)) - np.repeat(np.cumsum(d) - d, d)
+        nbr_pos = pos_of[_lookup(keys, nbr_ball.astype(np.int64) * n + self.inc_other[nbr_at])]
+        rhs = np.zeros((k, size, d.max()))
+        rhs[nbr_ball, nbr_pos, nbr_col] = 1
+        omegas = []
+        for L in (L_cut, L_short):
+            L[np.arange(k), center_pos, :] = 0
+            L[np.arange(k), :, center_pos] = 0
+            L[:, diag, diag] += L[:, diag, diag] == 0
+            X = np.linalg.solve(L, rhs)
+            omegas.append(X[nbr_ball, nbr_pos, nbr_col])
+
+        e = self.inc_edge[nbr_at]
+        np.minimum.at(self.omega_upper, e, omegas[0])
+        np.maximum.at(self.omega_lower, e, omegas[1])
+
+    def _solve_columns(self, vertices):
+        # columns of L+ of the given vertices, not yet solved, a block at a time
+        vertices = np.unique(vertices)
+        vertices = vertices[~self.solved[vertices]]
+        for block, cols in lplus_columns(self.lap_solver, vertices, self.block_size):
+            self.lplus_diag[block] = cols[block, np.arange(len(block))]
+            # L+[u, v] for the edges at the vertices of the block
+            lo, hi = self.inc_ptr[block], self.inc_ptr[block + 1]
+            which = np.repeat(np.arange(len(block)), hi - lo)
+            at = row_ranges(self.inc_ptr, block)
+            self.lplus_uv[self.inc_edge[at]] = cols[self.inc_other[at], which]
+            self.solved[block] = True
+        count('query_columns', len(vertices))
+        return len(vertices)
+
+    def _closed_neighborhoods(self, vertices):
+        return np.concatenate([vertices, self.inc_other[row_ranges(self.inc_ptr, vertices)]])
+
+    def _needed(self, which, candidates):
+        # vertices whose columns the exact values of the candidates need
+        if which == 'node':
+            return self._closed_neighborhoods(candidates)
+        return self._closed_neighborhoods(np.concatenate([self.edges_u[candidates], self.edges_v[candidates]]))
+
+    def _node_exact(self, vertices):
+        # exact node curvature of the vertices, whose closed neighborhoods have been solved
+        at = row_ranges(self.inc_ptr, vertices)
+        d = self.inc_ptr[vertices + 1] - self.inc_ptr[vertices]
+        i = np.repeat(vertices, d)
+        e, j = self.inc_edge[at], self.inc_other[at]
+        omega = self.lplus_diag[i] + self.lplus_diag[j] - 2 * self.lplus_uv[e]
+        return 1 - 0.5 * np.bincount(np.repeat(np.arange(len(vertices)), d), self.weights[e] * omega, minlength=len(vertices))
+
+    def _evaluate(self, which, candidates):
+        # returns: exact values of the candidates (vertices or edge numbers), solves done
+        solves = self._solve_columns(self._needed(which, candidates))
+        if which == 'node':
+            return self._node_exact(candidates), solves
+        u, v = self.edges_u[candidates], self.edges_v[candidates]
+        omega = self.lplus_diag[u] + self.lplus_diag[v] - 2 * self.lplus_uv[candidates]
+        return 2 * (self._node_exact(u) + self._node_exact(v)) / omega, solves
+
+    def _within_budget(self, which, candidates, budget):
+        # the longest prefix of candidates whose exact values need at most budget new columns
+        new = np.zeros(self.n, dtype=bool)
+        for t in range(len(candidates)):
+            needed = self._needed(which, candidates[t:t + 1])
+            grown = new.copy()
+            grown[needed[~self.solved[needed]]] = True
+            if grown.sum() > budget:
+                return candidates[:t]
+            new = grown
+        return candidates
+
+    def _bounds(self, which):
+        if which == 'node':
+            return self.node_lower.copy(), self.node_upper.copy()
+        u, v = self.edges_u, self.edges_v
+        num_lo = 2 * (self.node_lower[u] + self.node_lower[v])
+        num_hi = 2 * (self.node_upper[u] + self.node_upper[v])
+        # interval quotient of [num_lo, num_hi] by [omega_lower, omega_upper] > 0
+        lower = np.where(num_lo >= 0, num_lo / self.omega_upper, num_lo / self.omega_lower)
+        upper = np.where(num_hi >= 0, num_hi / self.omega_lower, num_hi / self.omega_upper)
+        return lower, upper
+
+    def _search(self, which, k, threshold, max_solves, batch_size):
+        if which not in ('node', 'link'):
+            raise ValueError("which must be 'node' or 'link'")
+        n_candidates = self.n if which == 'node' else len(self.edges_u)
+        values = np.full(n_candidates, np.nan)
+        exact = np.zeros(n_candidates, dtype=bool)
+        n_solves = 0
+        complete = False
+        with phase('curvature_query'):
+            while True:
+                lower, upper = self._bounds(which)
+                # the bounds of a vertex whose ball is its whole component coincide, up to rounding
+                lower = np.minimum(lower, upper)
+                lower[exact] = upper[exact] = values[exact]
+                if k is not None:
+                    # nothing with a lower bound above the k-th smallest upper bound can be in the top k
+                    cutoff = np.partition(upper, k - 1)[k - 1] if k > 0 else -np.inf
+                    alive = np.flatnonzero(~exact & (lower <= cutoff))
+                else:
+                    alive = np.flatnonzero(~exact & (lower <= threshold))
+
+                # grow the balls of the survivors before solving anything
+                owners = alive if which == 'node' else np.concatenate([self.edges_u[alive], self.edges_v[alive]])
+                owners = np.unique(owners)
+                owners = owners[~self.ball_final[owners]]
+                if len(owners):
+                    with phase('curvature_bounds'):
+                        for r in np.unique(self.ball_radius[owners]):
+                            group = owners[self.ball_radius[owners] == r]
+                            self._refine(group, min(max(2 * r, 1), self.max_radius))
+                        self._node_bounds()
+                    continue
+
+                candidates = alive[np.argsort(lower[alive], kind='stable')][:batch_size]
+                if len(candidates) == 0:
+                    # every answer is evaluated: anything not evaluated has a lower bound past the answer
+                    complete = True
+                    break
+                if max_solves is not None:
+                    candidates = self._within_budget(which, candidates, max_solves - n_solves)
+                    if len(candidates) == 0:
+                        break
+                vals, solves = self._evaluate(which, candidates)
+                n_solves += solves
+                values[candidates] = vals
+                exact[candidates] = True
+                count('query_evaluated', len(candidates))
+
+        if k is not None:
+            # the k candidates with the smallest upper bounds (their values once evaluated)
+            chosen = np.argsort(upper, kind='stable')[:k]
+            # certain when fewer than k others could be below it
+            sorted_lower = np.sort(lower)
+            others_below = np.searchsorted(sorted_lower, upper[chosen], side='left') - (lower[chosen] < upper[chosen])
+            certain = others_below < k
+        else:
+            chosen = np.flatnonzero(lower <= threshold)
+            chosen = chosen[np.argsort(upper[chosen], kind='stable')]
+            certain = upper[chosen] <= threshold
+        edges = (None, None) if which == 'node' else (self.edges_u[chosen], self.edges_v[chosen])
+        return QueryResult(chosen, edges[0], edges[1], values[chosen], lower[chosen], upper[chosen],
+                           certain, complete or bool(np.all(certain)), n_solves)
+
+    def most_negative(self, k, which='node', max_solves=None, batch_size=16):
+        # input:
+        # k (int) number of vertices (or edges) to return
+        # which (string) 'node' or 'link' resistance curvature
+        # max_solves (int or None) most Laplacian solves to spend (None runs to the exact answer)
+        # batch_size (int) candidates evaluated between two pruning steps
+        # returns: result (QueryResult) the k smallest curvatures, in increasing order
+        n_candidates = self.n if which == 'node' else len(self.edges_u)
+        return self._search(which, min(k, n_candidates), None, max_solves, batch_size)
+
+    def below(self, threshold, which='node', max_solves=None, batch_size=16):
+        # input: threshold (float), which, max_solves, batch_size as in most_negative
+        # returns: result (QueryResult) every vertex (or edge) with curvature at most threshold, in increasing
+        #          order; when incomplete it also holds the candidates not ruled out by their bounds
+        return self._search(which, None, threshold, max_solves, batch_size)
+
+
+def most_negative(A, k, which='node', solver='direct', max_solves=None):
+    # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix of a connected graph, k, which,
+    # max_solves as in CurvatureQuery.most_negative, solver as in CurvatureQuery
+    # returns: result (QueryResult) the k most negative node (or link) resistance curvatures
+    return CurvatureQuery(A, solver).most_negative(k, which, max_solves)
+
+
+def below(A, threshold, which='node', solver='direct', max_solves=None):
+    # input: as in most_negative, threshold (float)
+    # returns: result (QueryResult) every node (or link) resistance curvature at most threshold
+    return CurvatureQuery(A, solver).below(threshold, which, max_solves)
@@ -0,0 +1,63 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_curvature_from_omega
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_curvature_from_omega
+from Instrumentation.instrumentation import phase, count
+
+# Resistance curvature of a graph that changes one edge at a time.
+#
+# Changing the weight of edge (u, v) by delta changes the Laplacian by delta b b^T with
+# b = e_u - e_v. Since b is orthogonal to the all ones vector, the pseudo-inverse follows
+# the Sherman-Morrison formula
+#   L+  <-  L+ - delta (L+ b)(L+ b)^T / (1 + delta Omega[u, v])
+# which costs O(n^2) per step instead of a fresh O(n^3) pinv.
+# The graph must stay connected: removing a bridge makes the denominator vanish.
+
+
+class IncrementalResistanceCurvature:
+
+    def __init__(self, A):
+        # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted) of a connected graph
+        self.A_np = A.toarray().astype(float) if sp.issparse(A) else np.array(A, dtype=float)
+        L = np.diag(np.sum(self.A_np, axis=1)) - self.A_np
+        with phase('pinv'):
+            self.L_inv = np.linalg.pinv(L)
+        count('pinv')
+
+    def set_edge_weight(self, u, v, weight):
+        # reweight edge (u, v); weight 0 removes it, a positive weight on a non-edge adds it
+        delta = weight - self.A_np[u, v]
+        if delta == 0:
+            return
+        L_inv_b = self.L_inv[:, u] - self.L_inv[:, v]
+        omega_uv = L_inv_b[u] - L_inv_b[v]
+        denom = 1 + delta * omega_uv
+        if abs(denom) < 1e-12:
+            raise ValueError("removing edge ({}, {}) disconnects the graph".format(u, v))
+        with phase('sherman_morrison'):
+            self.L_inv -= (delta / denom) * np.outer(L_inv_b, L_inv_b)
+        count('rank_one_updates')
+        self.A_np[u, v] = weight
+        self.A_np[v, u] = weight
+
+    def add_edge(self, u, v, weight=1):
+        self.set_edge_weight(u, v, weight)
+
+    def remove_edge(self, u, v):
+        self.set_edge_weight(u, v, 0)
+
+    def omega(self):
+        # effective resistance matrix of the current graph
+        L_inv_diag = np.diag(self.L_inv)
+        return L_inv_diag[:, None] + L_inv_diag[None, :] - 2 * self.L_inv
+
+    def node_res_curvature(self):
+        # returns: node_curvature (list) Node resistance curvature at each vertex
+        return node_curvature_from_omega(self.A_np, self.omega()).tolist()
+
+    def link_res_curvature(self):
+        # returns: link_curvature (scipy sparse n x n matrix) link curvature of each edge
+        Omega = self.omega()
+        node_curvature = node_curvature_from_omega(self.A_np, Omega)
+        return link_curvature_from_omega(self.A_np, Omega, node_curvature)
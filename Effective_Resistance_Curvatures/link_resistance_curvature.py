@@ -1,35 +1,71 @@
 import numpy as np
+import scipy.sparse as sp
 
-def link_res_curvature(A):
-  # input: A (list) Adjacency Matrix (can be weighted if you want)
-  # returns: link_curvature (list) link curvature of each edge
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_curvature_from_omega
+from Effective_Resistance_Curvatures.sparse_resistance import edge_list, edge_resistances, node_curvature_from_edges, link_curvature_from_edges
+from Effective_Resistance_Curvatures.dense_resistance import lean_link_res_curvature
+from Curvature_Results.curvature_results import EdgeCurvature
+from Instrumentation.instrumentation import phase, count
 
-  # Convert adjacency matrix to numpy array
-  A_np = np.array(A)
-  n = len(A_np)
+def link_res_curvature(A, sparse=False, solver='direct', eps=None, seed=None, dtype=None):
+  # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted if you want)
+  # sparse (bool) use sparse Laplacian solves instead of the dense pseudo-inverse (the graph must be connected)
+  # solver, eps, seed - options of the sparse mode, see sparse_resistance.edge_resistances (eps=None is exact)
+  # dtype (numpy dtype, e.g. np.float32) compute Omega in one in-place n x n buffer of this dtype (the graph must be
+  # connected), see dense_resistance; None keeps the float64 pseudo-inverse
+  # returns: link_curvature (scipy sparse n x n matrix) link curvature of each edge, nonzero only on edges
+
+  if sparse:
+      edges_u, edges_v, weights, omega, lplus_diag = edge_resistances(A, solver, eps, seed)
+      n = len(lplus_diag)
+      node_curvature = node_curvature_from_edges(n, edges_u, edges_v, weights, omega)
+      return link_curvature_from_edges(n, edges_u, edges_v, omega, node_curvature)
+  if dtype is not None:
+      return lean_link_res_curvature(A, dtype)
+
+  with phase('laplacian'):
+      # Convert adjacency matrix to numpy array
+      A_np = A.toarray() if sp.issparse(A) else np.array(A)
+      n = len(A_np)
   
-  # Degree matrix (diagonal matrix where D[i, i] is the degree of node i)
-  Degree = np.diag(np.sum(A_np, axis=1))
+      # Degree matrix (diagonal matrix where D[i, i] is the degree of node i)
+      Degree = np.diag(np.sum(A_np, axis=1))
   
-  # Laplacian matrix
-  L = Degree - A_np
+      # Laplacian matrix
+      L = Degree - A_np
   
   # Compute the pseudo-inverse of the Laplacian matrix
-  L_inv = np.linalg.pinv(L)
+  with phase('pinv'):
+      L_inv = np.linalg.pinv(L)
+  count('pinv')
   
   # Compute the effective resistance matrix (Omega)
-  L_inv_diag = np.diag(L_inv)  # Extract diagonal elements
-  Omega = L_inv_diag[:, None] + L_inv_diag[None, :] - 2 * L_inv
+  with phase('omega'):
+      L_inv_diag = np.diag(L_inv)  # Extract diagonal elements
+      Omega = L_inv_diag[:, None] + L_inv_diag[None, :] - 2 * L_inv
   
   # Compute node resistance curvature
-  node_curvature = 1 - 0.5 * np.sum(Omega * A_np, axis=1)
+  node_curvature = node_curvature_from_omega(A_np, Omega)
+
+  return link_curvature_from_omega(A_np, Omega, node_curvature)
+
+def link_res_curvature_result(A, sparse=False, solver='direct', eps=None, seed=None, dtype=None):
+  # input: as in link_res_curvature
+  # returns: link_curvature (EdgeCurvature) link curvature of each edge, see Curvature_Results.curvature_results
+  edges_u, edges_v = edge_list(A)[:2]
+  link = link_res_curvature(A, sparse, solver, eps, seed, dtype)
+  # read on the edges, so an edge with curvature exactly 0 is kept
+  return EdgeCurvature(link.shape[0], edges_u, edges_v, np.asarray(link[edges_u, edges_v]).ravel())
 
-  # compute link resistance curvature
-  link_curvature = np.zeros([n, n])
+def link_curvature_from_omega(A, Omega, node_curvature):
+  # input: A (numpy array) Adjacency Matrix, Omega (numpy array) effective resistance matrix,
+  # node_curvature (numpy array) node resistance curvature at each vertex
+  # returns: link_curvature (scipy sparse matrix) link curvature of each edge
 
-  for i in range(n):
-      for j in range(n):
-          if A[i][j] != 0:
-              link_curvature[i][j] = (2 * (node_curvature[i] + node_curvature[j])) / Omega[i][j]
+  # compute link resistance curvature on the edges only
+  with phase('link_curvature'):
+    n = len(Omega)
+    i, j = np.nonzero(A)
+    link = (2 * (node_curvature[i] + node_curvature[j])) / Omega[i, j]
 
-  return link_curvature.tolist()
+  return sp.csr_matrix((link, (i, j)), shape=(n, n))
@@ -0,0 +1,64 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.sparse_resistance import (
+    edge_list, sparse_laplacian, LaplacianSolver, exact_edge_resistances, sketched_edge_resistances,
+    node_curvature_from_edges,
+)
+from Instrumentation.instrumentation import phase
+
+# DOS resistance curvature without forming Omega or L+.
+#
+# With d = diag(L+) and p the node resistance curvature, (L d)_i = 2 p_i - 2/n. Applying L to
+# Omega x = 1, with Omega = d 1^T + 1 d^T - 2 L+, leaves x = s p for a scalar s: the DOS curvature
+# is a multiple of the node curvature. Omega p = c 1 with c = 1/s, and with y = L+ p
+#   c = 2 (L+[u, u] - 2 y_u) + 2 p^T y
+# for any vertex u, so the scale costs two Laplacian solves on top of p.
+#
+# p needs the resistance across every edge:
+# - exactly, from the columns of L+: n Laplacian solves (in blocks), i.e. O(n nnz(LU)) work with
+#   the direct solver. On graphs whose factor fills in (scale-free graphs, say) that is slower
+#   than the dense pseudo-inverse, so use this mode for graphs too large for an n x n array;
+# - from the random sketch of sparse_resistance (eps): O(log n / eps^2) solves. Every edge
+#   resistance is within a factor 1 +- eps, so |p_i - exact p_i| <= eps (1 - p_i); the scale
+#   c is computed from the sketched p and carries an error of the same order.
+# The graph must be connected.
+
+
+def dos_from_node_curvature(lap_solver, node_curvature):
+    # input: lap_solver (LaplacianSolver) of the graph, node_curvature (numpy array) p at each vertex
+    # returns: resistance_curvature (numpy array) solution x = p / c of Omega x = 1
+    p = node_curvature
+    n = len(p)
+    with phase('dos_scale'):
+        y = lap_solver.solve(p - p.mean())
+        # L+[u, u] from the column of the last vertex
+        u = n - 1
+        e_u = np.full(n, -1 / n)
+        e_u[u] += 1
+        lplus_uu = lap_solver.solve(e_u)[u]
+        c = 2 * (lplus_uu - 2 * y[u]) + 2 * p @ y
+    return p / c
+
+
+def matrix_free_res_curvature(A, solver='direct', eps=None, seed=None, block_size=256):
+    # input:
+    # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted) of a connected graph
+    # solver (string) 'direct' (sparse LU) or 'cg' (conjugate gradients) Laplacian solves
+    # eps (float or None) None for exact edge resistances (n solves), otherwise the relative error of their
+    # random sketch (O(log n / eps^2) solves)
+    # seed (int or None) seed of the random sketch
+    # block_size (int) right-hand sides solved together
+    # returns: resistance_curvature (numpy array) solution x of Omega x = 1
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    edges_u, edges_v, weights = edge_list(A)
+    lap_solver = LaplacianSolver(sparse_laplacian(n, edges_u, edges_v, weights), solver)
+
+    with phase('edge_resistances'):
+        if eps is None:
+            omega, _ = exact_edge_resistances(lap_solver, n, edges_u, edges_v, block_size)
+        else:
+            omega, _ = sketched_edge_resistances(lap_solver, n, edges_u, edges_v, weights, eps, seed, block_size)
+    node_curvature = node_curvature_from_edges(n, edges_u, edges_v, weights, omega)
+
+    return dos_from_node_curvature(lap_solver, node_curvature)
@@ -1,27 +1,59 @@
 import numpy as np
+import scipy.sparse as sp
 
-def node_res_curvature(A):
-    # Input: A (list) Adjacency Matrix (can be weighted if you want)
+from Effective_Resistance_Curvatures.sparse_resistance import edge_resistances, node_curvature_from_edges
+from Effective_Resistance_Curvatures.dense_resistance import lean_node_res_curvature
+from Curvature_Results.curvature_results import VertexCurvature
+from Instrumentation.instrumentation import phase, count
+
+def node_res_curvature(A, sparse=False, solver='direct', eps=None, seed=None, dtype=None):
+    # Input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted if you want)
+    # sparse (bool) use sparse Laplacian solves instead of the dense pseudo-inverse (the graph must be connected)
+    # solver, eps, seed - options of the sparse mode, see sparse_resistance.edge_resistances (eps=None is exact)
+    # dtype (numpy dtype, e.g. np.float32) compute Omega in one in-place n x n buffer of this dtype (the graph must be
+    # connected), see dense_resistance; None keeps the float64 pseudo-inverse
     # Returns: node_curvature (list) Node resistance curvature at each vertex
+    # (node_res_curvature_result gives the same values as a VertexCurvature)
+    return node_res_curvature_result(A, sparse, solver, eps, seed, dtype).tolist()
+
+def node_res_curvature_result(A, sparse=False, solver='direct', eps=None, seed=None, dtype=None):
+    # Input: as in node_res_curvature
+    # Returns: node_curvature (VertexCurvature) Node resistance curvature at each vertex, see Curvature_Results.curvature_results
+    
+    if sparse:
+        edges_u, edges_v, weights, omega, lplus_diag = edge_resistances(A, solver, eps, seed)
+        return VertexCurvature(node_curvature_from_edges(len(lplus_diag), edges_u, edges_v, weights, omega))
+    if dtype is not None:
+        return VertexCurvature(lean_node_res_curvature(A, dtype))
     
-    # Convert adjacency matrix to numpy array
-    A_np = np.array(A)
-    n = len(A_np)
+    with phase('laplacian'):
+        # Convert adjacency matrix to numpy array
+        A_np = A.toarray() if sp.issparse(A) else np.array(A)
     
-    # Degree matrix (diagonal matrix where D[i, i] is the degree of node i)
-    Degree = np.diag(np.sum(A_np, axis=1))
+        # Degree matrix (diagonal matrix where D[i, i] is the degree of node i)
+        Degree = np.diag(np.sum(A_np, axis=1))
     
-    # Laplacian matrix
-    L = Degree - A_np
+        # Laplacian matrix
+        L = Degree - A_np
     
     # Compute the pseudo-inverse of the Laplacian matrix
-    L_inv = np.linalg.pinv(L)
+    with phase('pinv'):
+        L_inv = np.linalg.pinv(L)
+    count('pinv')
     
     # Compute the effective resistance matrix (Omega)
-    L_inv_diag = np.diag(L_inv)  # Extract diagonal elements
-    Omega = L_inv_diag[:, None] + L_inv_diag[None, :] - 2 * L_inv
+    with phase('omega'):
+        L_inv_diag = np.diag(L_inv)  # Extract diagonal elements
+        Omega = L_inv_diag[:, None] + L_inv_diag[None, :] - 2 * L_inv
+    
+    return VertexCurvature(node_curvature_from_omega(A_np, Omega))
+
+def node_curvature_from_omega(A_np, Omega):
+    # Input: A_np (numpy array) Adjacency Matrix, Omega (numpy array) effective resistance matrix
+    # Returns: node_curvature (numpy array) Node resistance curvature at each vertex
     
     # Compute node resistance curvature
-    node_curvature = 1 - 0.5 * np.sum(Omega * A_np, axis=1)
+    with phase('node_curvature'):
+        node_curvature = 1 - 0.5 * np.sum(Omega * A_np, axis=1)
     
-    return node_curvature.tolist()
+    return node_curvature
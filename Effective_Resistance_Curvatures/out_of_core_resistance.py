@@ -0,0 +1,94 @@
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from Effective_Resistance_Curvatures.sparse_resistance import edge_list, sparse_laplacian, LaplacianSolver, lplus_columns
+from Instrumentation.instrumentation import phase, count
+
+# DOS resistance curvature (the solution x of Omega x = 1) for graphs whose n x n
+# effective resistance matrix does not fit in memory.
+#
+# Omega lives in a float64 np.memmap file of n^2 * 8 bytes and is never held in RAM:
+# - the columns of L+ are obtained block_size at a time from one factorized sparse
+#   Laplacian and written as rows (L+ is symmetric), collecting diag(L+) on the way;
+# - a second pass turns each row block of L+ into Omega in place,
+#   Omega[i, j] = L+[i, i] + L+[j, j] - 2 L+[i, j];
+# - Omega x = 1 is solved with MINRES (Omega is symmetric, nonsingular and indefinite),
+#   each matvec streaming Omega from disk one row block at a time.
+# Peak memory is O(n * block_size). The graph must be connected.
+
+
+def omega_memmap(A, path, solver='direct', block_size=256):
+    # input:
+    # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted) of a connected graph
+    # path (string) file to hold Omega (created or overwritten)
+    # solver (string) 'direct' or 'cg', see sparse_resistance.LaplacianSolver
+    # block_size (int) rows of Omega (columns of L+) computed together
+    # returns: Omega (n x n np.memmap) effective resistance matrix, backed by path
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    edges_u, edges_v, weights = edge_list(A)
+    lap_solver = LaplacianSolver(sparse_laplacian(n, edges_u, edges_v, weights), solver)
+
+    Omega = np.memmap(path, dtype=np.float64, mode='w+', shape=(n, n))
+    lplus_diag = np.empty(n)
+    with phase('lplus_blocks'):
+        for block, cols in lplus_columns(lap_solver, np.arange(n), block_size):
+            lplus_diag[block] = cols[block, np.arange(len(block))]
+            Omega[block[0]:block[-1] + 1] = cols.T
+
+    with phase('omega_blocks'):
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            block = np.array(Omega[start:stop])
+            block *= -2
+            block += lplus_diag[start:stop, None]
+            block += lplus_diag[None, :]
+            Omega[start:stop] = block
+    Omega.flush()
+    return Omega
+
+
+def streamed_solve(Omega, b, block_size=256, tol=1e-12, maxiter=None):
+    # input:
+    # Omega (n x n array or np.memmap) symmetric matrix, read one row block per matvec
+    # b (numpy array) right-hand side
+    # tol (float) relative residual tolerance of MINRES
+    # returns: x (numpy array) solution of Omega x = b
+    n = Omega.shape[0]
+
+    def matvec(x):
+        x = np.ravel(x)
+        y = np.empty(n)
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            y[start:stop] = Omega[start:stop] @ x
+        count('streamed_matvecs')
+        return y
+
+    op = spla.LinearOperator((n, n), matvec=matvec, dtype=np.float64)
+    with phase('minres'):
+        x, info = spla.minres(op, b, rtol=tol, maxiter=maxiter)
+    if info != 0:
+        raise RuntimeError("MINRES did not converge")
+    return x
+
+
+def out_of_core_res_curvature(A, directory=None, solver='direct', block_size=256, tol=1e-12):
+    # input:
+    # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted) of a connected graph
+    # directory (string or None) where the temporary Omega file goes (the system temporary directory if None);
+    #                            it needs n^2 * 8 bytes of free space and the file is removed afterwards
+    # solver, block_size, tol - see omega_memmap and streamed_solve
+    # returns: resistance_curvature (numpy array) solution x of Omega x = 1
+    fd, path = tempfile.mkstemp(suffix='.omega', dir=directory)
+    os.close(fd)
+    try:
+        Omega = omega_memmap(A, path, solver, block_size)
+        x = streamed_solve(Omega, np.ones(Omega.shape[0]), block_size, tol)
+        del Omega
+    finally:
+        os.remove(path)
+    return x
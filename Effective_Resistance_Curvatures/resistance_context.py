@@ -0,0 +1,180 @@
+from collections import OrderedDict
+
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature_from_omega
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_curvature_from_omega
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_curvature_from_omega
+from Effective_Resistance_Curvatures.sparse_resistance import (
+    edge_list, sparse_laplacian, LaplacianSolver, exact_edge_resistances,
+    node_curvature_from_edges, link_curvature_from_edges,
+)
+from Effective_Resistance_Curvatures.matrix_free_resistance import dos_from_node_curvature
+from Graph_IO.graph_cache import graph_key
+from Instrumentation.instrumentation import phase, count
+
+# A graph whose Laplacian has been factorized once, serving the DOS, node and link
+# resistance curvatures and single Omega lookups without redoing pinv(L).
+#
+# resistance_context(A) memoizes contexts by Graph_IO.graph_cache.graph_key in an LRU
+# cache whose total size (in bytes of the arrays held) is bounded by set_cache_limit.
+# Contexts grow as results are computed lazily, so the bound is enforced on every lookup
+# and again whenever a cached context materializes an array (Omega, the edge resistances,
+# a curvature).
+
+
+class ResistanceContext:
+    # dense: holds L+ (and, once asked for, the full Omega)
+    # sparse: holds a factorized grounded Laplacian, diag(L+) and the resistances on the edges;
+    #         the DOS curvature is a multiple of the node curvature (see matrix_free_resistance)
+
+    def __init__(self, A, sparse=False, solver='direct'):
+        self.sparse = sparse
+        self._results = {}
+        # key in the cache of resistance_context, if the context is cached
+        self._key = None
+        if sparse:
+            self.n = A.shape[0] if sp.issparse(A) else len(A)
+            self.edges_u, self.edges_v, self.weights = edge_list(A)
+            L = sparse_laplacian(self.n, self.edges_u, self.edges_v, self.weights)
+            self.lap_solver = LaplacianSolver(L, solver)
+            self._edge_omega = None
+            self._lplus_diag = None
+        else:
+            self.A_np = A.toarray() if sp.issparse(A) else np.array(A)
+            self.n = len(self.A_np)
+            L = np.diag(np.sum(self.A_np, axis=1)) - self.A_np
+            with phase('pinv'):
+                self.lplus = np.linalg.pinv(L)
+            count('pinv')
+            self._omega = None
+
+    def nbytes(self):
+        # memory held by the arrays of this context
+        if self.sparse:
+            held = [self.edges_u, self.edges_v, self.weights, self._edge_omega, self._lplus_diag]
+            lu = getattr(self.lap_solver, 'lu', None)
+            size = 0 if lu is None else (lu.L.data.nbytes + lu.U.data.nbytes + lu.L.indices.nbytes + lu.U.indices.nbytes)
+        else:
+            held = [self.A_np, self.lplus, self._omega]
+            size = 0
+        held += list(self._results.values())
+        for x in held:
+            if isinstance(x, np.ndarray):
+                size += x.nbytes
+            elif sp.issparse(x):
+                size += x.data.nbytes + x.indices.nbytes + x.indptr.nbytes
+        return size
+
+    def omega_matrix(self):
+        # full effective resistance matrix (dense mode)
+        if self.sparse:
+            raise ValueError("the full Omega is only available in dense mode")
+        if self._omega is None:
+            with phase('omega'):
+                d = np.diag(self.lplus)
+                self._omega = d[:, None] + d[None, :] - 2 * self.lplus
+            self._grew()
+        return self._omega
+
+    def edge_omega(self):
+        # effective resistance across each edge (sparse mode)
+        if self._edge_omega is None:
+            with phase('edge_resistances'):
+                self._edge_omega, self._lplus_diag = exact_edge_resistances(self.lap_solver, self.n, self.edges_u, self.edges_v, 256)
+            self._grew()
+        return self._edge_omega
+
+    def edge_resistances(self):
+        # returns: edges_u, edges_v, weights (the edges, edges_u < edges_v), omega (effective resistance
+        #          across each edge), lplus_diag (diagonal of L+), in either mode
+        if self.sparse:
+            omega = self.edge_omega()
+            return self.edges_u, self.edges_v, self.weights, omega, self._lplus_diag
+        edges_u, edges_v, weights = edge_list(self.A_np)
+        d = np.diag(self.lplus)
+        return edges_u, edges_v, weights, d[edges_u] + d[edges_v] - 2 * self.lplus[edges_u, edges_v], d
+
+    def omega(self, i, j):
+        # effective resistance between vertices i and j
+        if not self.sparse:
+            return self.lplus[i, i] + self.lplus[j, j] - 2 * self.lplus[i, j]
+        b = np.zeros(self.n)
+        b[i] += 1
+        b[j] -= 1
+        x = self.lap_solver.solve(b)
+        return x[i] - x[j]
+
+    def res_curvature(self):
+        if self.sparse:
+            res = self._result('res', lambda: dos_from_node_curvature(self.lap_solver, self._node_curvature()))
+        else:
+            res = self._result('res', lambda: res_curvature_from_omega(self.omega_matrix()))
+        return res.tolist()
+
+    def _node_curvature(self):
+        if self.sparse:
+            return self._result('node', lambda: node_curvature_from_edges(self.n, self.edges_u, self.edges_v, self.weights, self.edge_omega()))
+        return self._result('node', lambda: node_curvature_from_omega(self.A_np, self.omega_matrix()))
+
+    def node_res_curvature(self):
+        return self._node_curvature().tolist()
+
+    def link_res_curvature(self):
+        if self.sparse:
+            return self._result('link', lambda: link_curvature_from_edges(self.n, self.edges_u, self.edges_v, self.edge_omega(), self._node_curvature()))
+        return self._result('link', lambda: link_curvature_from_omega(self.A_np, self.omega_matrix(), self._node_curvature()))
+
+    def _result(self, name, compute):
+        # a curvature, computed the first time it is asked for
+        if name not in self._results:
+            self._results[name] = compute()
+            self._grew()
+        return self._results[name]
+
+    def _grew(self):
+        # an array was materialized: a cached context is now the most recently used, and may push the cache past its limit
+        if self._key is not None and self._key in _cache:
+            _cache.move_to_end(self._key)
+            _evict()
+
+
+_cache = OrderedDict()
+_cache_limit = 2 ** 30
+
+
+def set_cache_limit(max_bytes):
+    # bound the memory (in bytes) held by cached contexts; least recently used ones are evicted
+    global _cache_limit
+    _cache_limit = max_bytes
+    _evict()
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def _evict():
+    total = sum(ctx.nbytes() for ctx in _cache.values())
+    while _cache and total > _cache_limit:
+        _, ctx = _cache.popitem(last=False)
+        total -= ctx.nbytes()
+
+
+def resistance_context(A, sparse=False, solver='direct'):
+    # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted if you want)
+    # sparse, solver - as in ResistanceContext
+    # returns: context (ResistanceContext) shared by every call with the same graph and options
+    key = graph_key(A, sparse, solver)
+    if key in _cache:
+        count('context_cache_hits')
+        _cache.move_to_end(key)
+        ctx = _cache[key]
+        _evict()
+        return ctx
+    ctx = ResistanceContext(A, sparse, solver)
+    ctx._key = key
+    _cache[key] = ctx
+    _evict()
+    return ctx
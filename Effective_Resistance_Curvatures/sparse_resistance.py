@@ -0,0 +1,208 @@
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+from scipy.sparse.csgraph import connected_components
+
+from Instrumentation.instrumentation import phase, count
+
+# Effective resistances from a sparse Laplacian, without forming the dense pseudo-inverse.
+#
+# Node and link resistance curvature only need Omega on the edges of the graph,
+#   Omega[u, v] = L+[u, u] + L+[v, v] - 2 L+[u, v],
+# which we get from Laplacian solves:
+# - exactly, by solving L x = e_j - 1/n for the columns of L+ a block at a time, or
+# - approximately (Spielman-Srivastava), with a Johnson-Lindenstrauss sketch
+#   Z = L+ B^T W^(1/2) Q^T  (n x k, Q a random +-1/sqrt(k) matrix), so that
+#   Omega[u, v] ~ |Z[u] - Z[v]|^2 and L+[u, u] ~ |Z[u]|^2 within a factor (1 +- eps).
+# The graph must be connected (LaplacianSolver raises ValueError otherwise); split a
+# disconnected graph with component_resistance_curvature.
+
+
+def group_ranges(starts, lengths):
+    # concatenation of range(s, s + l) for each start s and length l
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def row_ranges(indptr, rows):
+    # positions in the csr arrays (indices, data) of the entries of the given rows, row after row
+    starts = indptr[rows]
+    return group_ranges(starts, indptr[rows + 1] - starts)
+
+
+def edge_list(A):
+    # input: A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted)
+    # returns: edges_u, edges_v (numpy arrays, edges_u < edges_v), weights (numpy array) of every edge
+    if sp.issparse(A):
+        A_up = sp.triu(A, k=1).tocoo()
+        order = np.lexsort((A_up.col, A_up.row))
+        keep = A_up.data[order] != 0
+        return A_up.row[order][keep].astype(np.int64), A_up.col[order][keep].astype(np.int64), A_up.data[order][keep].astype(float)
+    A_np = np.asarray(A)
+    edges_u, edges_v = np.nonzero(np.triu(A_np, k=1))
+    return edges_u.astype(np.int64), edges_v.astype(np.int64), A_np[edges_u, edges_v].astype(float)
+
+
+def sparse_laplacian(n, edges_u, edges_v, weights):
+    # returns: L (scipy csr matrix) weighted graph Laplacian D - A
+    rows = np.concatenate([edges_u, edges_v, edges_u, edges_v])
+    cols = np.concatenate([edges_v, edges_u, edges_u, edges_v])
+    data = np.concatenate([-weights, -weights, weights, weights])
+    return sp.csr_matrix((data, (rows, cols)), shape=(n, n))
+
+
+def check_connected(A):
+    # raise ValueError unless the graph of A (adjacency or Laplacian, any format) is connected:
+    # grounding one vertex of a disconnected graph leaves a singular system whose solutions are garbage
+    n = A.shape[0]
+    if n > 1 and connected_components(sp.csr_matrix(A), directed=False)[0] > 1:
+        raise ValueError("the graph is not connected; use component_resistance_curvature.component_res_curvature")
+
+
+class LaplacianSolver:
+    # Applies L+ to vectors b with zero sum.
+    # The last vertex is grounded (its row and column removed), which makes the rest of L
+    # positive definite; the grounded solution is then shifted to have zero mean.
+    # solver = 'direct' factorizes the grounded Laplacian once (sparse LU),
+    # solver = 'cg' runs Jacobi-preconditioned conjugate gradients to relative tolerance tol.
+
+    def __init__(self, L, solver='direct', tol=1e-10):
+        self.n = L.shape[0]
+        check_connected(L)
+        self.solver = solver
+        self.tol = tol
+        L_g = sp.csc_matrix(L)[:-1, :-1]
+        if solver == 'direct':
+            with phase('factorize'):
+                self.lu = spla.splu(L_g)
+            count('factorize')
+        elif solver == 'cg':
+            self.L_g = L_g.tocsr()
+            self.precond = sp.diags(1 / L_g.diagonal())
+        else:
+            raise ValueError("solver must be 'direct' or 'cg'")
+
+    def solve(self, b):
+        # b (n or n x k numpy array) right-hand side(s), each column summing to zero
+        b = np.asarray(b, dtype=float)
+        count('solves', 1 if b.ndim == 1 else b.shape[1])
+        x = np.zeros(b.shape)
+        if self.n == 1:
+            return x
+        if self.solver == 'direct':
+            x[:-1] = self.lu.solve(b[:-1])
+        elif b.ndim == 1:
+            x[:-1] = self._cg(b[:-1])
+        else:
+            for j in range(b.shape[1]):
+                x[:-1, j] = self._cg(b[:-1, j])
+        return x - x.mean(axis=0)
+
+    def _cg(self, b):
+        iterations = []
+        y, info = spla.cg(self.L_g, b, rtol=self.tol, atol=0.0, M=self.precond, callback=iterations.append)
+        count('cg_iterations', len(iterations))
+        if info != 0:
+            raise RuntimeError("conjugate gradients did not converge")
+        return y
+
+
+def lplus_columns(solver, vertices, block_size):
+    # yields (block, cols): the vertices block_size at a time, and the columns L+[:, block]
+    # (n x len(block)); L+ e_j = L+ (e_j - 1/n) since L+ 1 = 0
+    n = solver.n
+    for start in range(0, len(vertices), block_size):
+        block = vertices[start:start + block_size]
+        rhs = np.full((n, len(block)), -1 / n)
+        rhs[block, np.arange(len(block))] += 1
+        yield block, solver.solve(rhs)
+
+
+def exact_edge_resistances(solver, n, edges_u, edges_v, block_size):
+    # columns of L+ a block at a time
+    lplus_diag = np.empty(n)
+    lplus_uv = np.empty(len(edges_u))
+    by_v = np.argsort(edges_v, kind='stable')
+    v_sorted = edges_v[by_v]
+    for block, cols in lplus_columns(solver, np.arange(n), block_size):
+        start = block[0]
+        lplus_diag[block] = cols[block, np.arange(len(block))]
+        # edges whose second vertex has its column in this block
+        lo, hi = np.searchsorted(v_sorted, [start, start + len(block)])
+        e = by_v[lo:hi]
+        lplus_uv[e] = cols[edges_u[e], edges_v[e] - start]
+    omega = lplus_diag[edges_u] + lplus_diag[edges_v] - 2 * lplus_uv
+    return omega, lplus_diag
+
+
+def sketch_size(n, eps):
+    # number of random projections for a (1 +- eps) Johnson-Lindenstrauss guarantee on n points
+    return int(np.ceil(4 * np.log(max(n, 2)) / (eps ** 2 / 2 - eps ** 3 / 3)))
+
+
+def sketched_edge_resistances(solver, n, edges_u, edges_v, weights, eps, seed, block_size):
+    # Z is formed block_size columns at a time and summed into omega and diag(L+) right away,
+    # and Q and the rows of Z on the edges are taken n edges at a time, so no array is larger
+    # than n x block_size (besides the per-edge and per-vertex results)
+    k = sketch_size(n, eps)
+    rng = np.random.default_rng(seed)
+    n_edges = len(edges_u)
+    # B^T W^(1/2), B the signed edge-vertex incidence matrix
+    sqrt_w = np.sqrt(weights)
+    BW = sp.csc_matrix((np.concatenate([sqrt_w, -sqrt_w]),
+                        (np.concatenate([edges_u, edges_v]), np.tile(np.arange(n_edges), 2))),
+                       shape=(n, n_edges))
+    chunks = [(lo, min(lo + max(n, 1), n_edges)) for lo in range(0, n_edges, max(n, 1))]
+    omega = np.zeros(n_edges)
+    lplus_diag = np.zeros(n)
+    for start in range(0, k, block_size):
+        width = min(block_size, k - start)
+        Y = np.zeros((n, width))
+        for lo, hi in chunks:
+            Q = rng.choice([-1.0, 1.0], size=(hi - lo, width)) / np.sqrt(k)
+            Y += BW[:, lo:hi] @ Q
+        Z = solver.solve(Y)
+        lplus_diag += np.sum(Z ** 2, axis=1)
+        for lo, hi in chunks:
+            omega[lo:hi] += np.sum((Z[edges_u[lo:hi]] - Z[edges_v[lo:hi]]) ** 2, axis=1)
+    return omega, lplus_diag
+
+
+def edge_resistances(A, solver='direct', eps=None, seed=None, block_size=256):
+    # input:
+    # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted), of a connected graph
+    # solver (string) 'direct' (sparse LU) or 'cg' (conjugate gradients) Laplacian solves
+    # eps (float or None) None for exact resistances, otherwise the relative error of the random sketch
+    # seed (int or None) seed of the random sketch
+    # block_size (int) number of right-hand sides solved together, bounds the working memory by n * block_size
+    # returns:
+    # edges_u, edges_v, weights (numpy arrays) the edges of the graph, edges_u < edges_v
+    # omega (numpy array) effective resistance across each edge
+    # lplus_diag (numpy array) diagonal of the Laplacian pseudo-inverse
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    with phase('laplacian'):
+        edges_u, edges_v, weights = edge_list(A)
+        L = sparse_laplacian(n, edges_u, edges_v, weights)
+    lap_solver = LaplacianSolver(L, solver)
+
+    with phase('edge_resistances'):
+        if eps is None:
+            omega, lplus_diag = exact_edge_resistances(lap_solver, n, edges_u, edges_v, block_size)
+        else:
+            omega, lplus_diag = sketched_edge_resistances(lap_solver, n, edges_u, edges_v, weights, eps, seed, block_size)
+
+    return edges_u, edges_v, weights, omega, lplus_diag
+
+
+def node_curvature_from_edges(n, edges_u, edges_v, weights, omega):
+    # node resistance curvature 1 - 1/2 sum_j A[i, j] Omega[i, j] from per-edge values
+    half = 0.5 * weights * omega
+    return 1 - np.bincount(edges_u, half, minlength=n) - np.bincount(edges_v, half, minlength=n)
+
+
+def link_curvature_from_edges(n, edges_u, edges_v, omega, node_curvature):
+    # link resistance curvature 2 (p_i + p_j) / Omega[i, j] on each edge, as a symmetric sparse matrix
+    link = 2 * (node_curvature[edges_u] + node_curvature[edges_v]) / omega
+    rows = np.concatenate([edges_u, edges_v])
+    cols = np.concatenate([edges_v, edges_u])
+    return sp.csr_matrix((np.concatenate([link, link]), (rows, cols)), shape=(n, n))
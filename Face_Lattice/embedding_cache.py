@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+from Face_Lattice.planar_face_lattice import FaceLattice, planar_face_lattice, rotation_arrays
+from Graph_IO.graph_cache import graph_key, save_npz_atomic
+
+# Planar embeddings (as FaceLattice objects) computed once and reused.
+#
+# planar_embedding(A) returns a FaceLattice that can be handed to devos_mohar_curvature,
+# p_k_vector, forman, ... in place of the embedding. With cache_dir it is also stored on disk
+# as <cache_dir>/<key>.npz, so later runs on the same graph load it instead of testing
+# planarity and tracing faces again.
+#
+# The key is Graph_IO.graph_cache.graph_key of the graph and of the embedding it was built
+# from (embedding_param), so a different embedding of the same graph is a different entry.
+
+
+def embedding_param(embedding, n):
+    # the embedding as a graph_key parameter: None, or its rotation system as int64 arrays
+    if embedding is None:
+        return None
+    return tuple(np.asarray(a, dtype=np.int64) for a in rotation_arrays(embedding, n))
+
+
+def planar_embedding(A, embedding=None, cache_dir=None):
+    # input:
+    # A (numpy array or scipy sparse matrix) - the Adjacency Matrix of a planar graph
+    # embedding (optional) - planar embedding or rotation system to build from, see planar_face_lattice
+    # cache_dir (string, optional) - directory of cached embeddings
+    # returns:
+    # lattice (FaceLattice) - the embedding with its faces, to pass to the planar curvature functions
+    if cache_dir is None:
+        return planar_face_lattice(A, embedding)
+
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    path = os.path.join(cache_dir, graph_key(A, embedding_param(embedding, n)) + '.npz')
+    if os.path.exists(path):
+        return FaceLattice.load(path)
+
+    lattice = planar_face_lattice(A, embedding)
+    os.makedirs(cache_dir, exist_ok=True)
+    save_npz_atomic(path, lattice.arrays())
+    return lattice
@@ -0,0 +1,172 @@
+import numpy as np
+import networkx as nx
+import scipy.sparse as sp
+
+from Face_Lattice.planar_face_lattice import rotation_arrays
+from Instrumentation.instrumentation import phase, count
+
+# Devos-Mohar and Forman curvature of an embedded planar graph that changes one edge at a time.
+#
+# The embedding is kept as a rotation system (neighbors of each vertex in clockwise order)
+# together with the face of every half-edge (a, b). Inserting an edge splits one face in two
+# and removing an edge merges its two faces, so only those faces are retraced, and only the
+# vertices on them (Devos-Mohar) and the edges on them or at the endpoints of the changed
+# edge (Forman) are recomputed.
+
+
+class IncrementalPlanarCurvature:
+
+    def __init__(self, A, embedding=None):
+        # A (numpy array or scipy sparse matrix) - the Adjacency Matrix of a planar graph
+        # embedding (optional) - planar embedding or rotation system, see planar_face_lattice; computed with nx.check_planarity if not given
+        self.n = A.shape[0] if sp.issparse(A) else len(A)
+        if embedding is None:
+            G_nx = nx.from_scipy_sparse_array(A) if sp.issparse(A) else nx.Graph(np.asarray(A))
+            is_planar, embedding = nx.check_planarity(G_nx)
+            if not is_planar:
+                raise ValueError("graph is not planar")
+
+        rot_offsets, rot_neighbors = rotation_arrays(embedding, self.n)
+        self.rotation = {}
+        for w in range(self.n):
+            self.rotation[w] = rot_neighbors[rot_offsets[w]:rot_offsets[w + 1]].tolist()
+
+        self.face_of = {}  # half-edge (a, b) -> face id
+        self.faces = {}  # face id -> half-edges in traversal order
+        self._next_face_id = 0
+        self._retrace([(a, b) for a in range(self.n) for b in self.rotation[a]])
+
+        self.dm_curvature = np.zeros(self.n)
+        for v in range(self.n):
+            self.dm_curvature[v] = self._devos_mohar_at(v)
+        self.forman_curvature = {}
+        for a in range(self.n):
+            for b in self.rotation[a]:
+                if a < b:
+                    self.forman_curvature[(a, b)] = self._forman_at(a, b)
+
+    def _next_half_edge(self, a, b):
+        # (b, c) with c the ccw successor of a around b, the rule nx traverse_face uses
+        rot_b = self.rotation[b]
+        return b, rot_b[rot_b.index(a) - 1]
+
+    def _retrace(self, half_edges):
+        # (re)build the faces through the given half-edges, returns the new face ids
+        for h in half_edges:
+            self.face_of.pop(h, None)
+        new_faces = []
+        for start in half_edges:
+            if start in self.face_of:
+                continue
+            f = self._next_face_id
+            self._next_face_id += 1
+            walk = []
+            h = start
+            while h not in self.face_of:
+                self.face_of[h] = f
+                walk.append(h)
+                h = self._next_half_edge(*h)
+            self.faces[f] = walk
+            new_faces.append(f)
+        return new_faces
+
+    def _edges_of_face(self, f):
+        return set(tuple(sorted(h)) for h in self.faces[f])
+
+    def _devos_mohar_at(self, v):
+        # 1 - deg(v)/2 + sum_{f containing v} 1/size(f)
+        faces_at_v = set(self.face_of[(v, w)] for w in self.rotation[v])
+        curv = 1 - len(self.rotation[v]) / 2
+        for f in faces_at_v:
+            curv += 1 / len(self.faces[f])
+        return curv
+
+    def _forman_at(self, u, v):
+        # #faces + #vertices - #parallel neighbors of the edge (u, v)
+        faces_of_e = set([self.face_of[(u, v)], self.face_of[(v, u)]])
+        n_parallel = 0
+        # edges on a face of e with no vertex in common with e
+        for f in faces_of_e:
+            for a, b in self._edges_of_face(f):
+                if a not in (u, v) and b not in (u, v):
+                    n_parallel += 1
+        # edges at a vertex of e on no face of e
+        for w in (u, v):
+            for x in self.rotation[w]:
+                if self.face_of[(w, x)] not in faces_of_e and self.face_of[(x, w)] not in faces_of_e:
+                    n_parallel += 1
+        return len(faces_of_e) + 2 - n_parallel
+
+    def _update(self, u, v, old_faces, new_faces):
+        # recompute curvature next to the changed edge and faces
+        for f in old_faces:
+            del self.faces[f]
+        verts = set([u, v])
+        edges = set()
+        for f in new_faces:
+            for a, b in self.faces[f]:
+                verts.add(a)
+                edges.add((min(a, b), max(a, b)))
+        for w in (u, v):
+            for x in self.rotation[w]:
+                edges.add((min(w, x), max(w, x)))
+        with phase('local_update'):
+            for w in verts:
+                self.dm_curvature[w] = self._devos_mohar_at(w)
+            for a, b in edges:
+                self.forman_curvature[(a, b)] = self._forman_at(a, b)
+        count('faces_retraced', len(new_faces))
+        count('vertices_updated', len(verts))
+        count('edges_updated', len(edges))
+
+    def add_edge(self, u, v, face=None):
+        # insert the edge (u, v) through a face containing both u and v
+        # face (int, optional) - id of that face (see faces_containing); the first one found if not given
+        if v in self.rotation[u]:
+            raise ValueError("({}, {}) is already an edge".format(u, v))
+        candidates = self.faces_containing(u, v)
+        if face is None:
+            if not candidates:
+                raise ValueError("no face contains both {} and {}".format(u, v))
+            face = candidates[0]
+        elif face not in candidates:
+            raise ValueError("face {} does not contain both {} and {}".format(face, u, v))
+
+        # place v around u (and u around v) between the two half-edges of the face meeting there
+        walk = self.faces[face]
+        for a, b in ((u, v), (v, u)):
+            i = [h[0] for h in walk].index(a)
+            prev_tail = walk[i - 1][0]
+            rot_a = self.rotation[a]
+            rot_a.insert(rot_a.index(prev_tail), b)
+
+        new_faces = self._retrace(list(walk) + [(u, v), (v, u)])
+        self._update(u, v, [face], new_faces)
+
+    def remove_edge(self, u, v):
+        # delete the edge (u, v), merging the faces on its two sides
+        if v not in self.rotation[u]:
+            raise ValueError("({}, {}) is not an edge".format(u, v))
+        old_faces = list(set([self.face_of[(u, v)], self.face_of[(v, u)]]))
+        half_edges = [h for f in old_faces for h in self.faces[f] if h != (u, v) and h != (v, u)]
+        self.rotation[u].remove(v)
+        self.rotation[v].remove(u)
+        del self.face_of[(u, v)]
+        del self.face_of[(v, u)]
+        del self.forman_curvature[(min(u, v), max(u, v))]
+        new_faces = self._retrace(half_edges)
+        self._update(u, v, old_faces, new_faces)
+
+    def faces_containing(self, u, v):
+        # ids of the faces whose boundary passes through both u and v
+        faces_u = set(self.face_of[(u, w)] for w in self.rotation[u])
+        faces_v = set(self.face_of[(v, w)] for w in self.rotation[v])
+        return sorted(faces_u & faces_v)
+
+    def devos_mohar_curvature(self):
+        # returns: curvature (list) - Devos-Mohar curvature at each vertex
+        return self.dm_curvature.tolist()
+
+    def forman(self):
+        # returns: forman_dict (dictionary) - each key is an edge (u, v), u < v, and the value is its Forman curvature
+        return dict(self.forman_curvature)
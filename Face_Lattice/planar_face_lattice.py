@@ -0,0 +1,218 @@
+import numpy as np
+import networkx as nx
+import scipy.sparse as sp
+
+from Instrumentation.instrumentation import phase, count
+
+# Face lattice of a planar graph (vertices, edges and 2-faces of its embedding in the sphere)
+# built in a single pass over half-edges.
+#
+# Edge e = (u, v) with u < v owns the half-edges 2e (u -> v) and 2e + 1 (v -> u).
+# Vertices, edges and faces are numbered in the same order the old poset builders used:
+# edges by (u, v) lexicographically, faces in the order they are first met while walking
+# the half-edges 0, 1, 2, ...
+# The poset index of vertex i is i + 1, of edge e is n + e + 1 and of face f is n + E + f + 1.
+#
+# A FaceLattice also keeps the rotation system it was built from, so it can stand in for the
+# embedding: every planar curvature function accepts it and then skips the planarity test and
+# the face traversal. It only holds NumPy arrays, so it pickles and saves (save / load) cheaply.
+
+
+class FaceLattice:
+    # n_verts (int) - number of vertices
+    # edge_verts (E x 2 int array) - the two vertices (u < v) of each edge
+    # edge_faces (E x 2 int array) - face on the u -> v side and face on the v -> u side of each edge
+    # face_offsets (F + 1 int array) - face f is face_verts[face_offsets[f]:face_offsets[f + 1]]
+    # face_verts (2E int array) - vertices of each face, in traversal order
+    # face_half_edges (2E int array) - half-edges of each face, in traversal order
+    # rot_offsets, rot_neighbors (int arrays) - rotation system, the neighbors of v in clockwise
+    #                                          order are rot_neighbors[rot_offsets[v]:rot_offsets[v + 1]]
+
+    def __init__(self, n_verts, edge_verts, edge_faces, face_offsets, face_verts, face_half_edges, rot_offsets, rot_neighbors):
+        self.n_verts = n_verts
+        self.edge_verts = edge_verts
+        self.edge_faces = edge_faces
+        self.face_offsets = face_offsets
+        self.face_verts = face_verts
+        self.face_half_edges = face_half_edges
+        self.rot_offsets = rot_offsets
+        self.rot_neighbors = rot_neighbors
+
+    def arrays(self):
+        # the lattice as a dictionary of arrays (the contents of its .npz file)
+        return dict(n_verts=np.int64(self.n_verts), edge_verts=self.edge_verts, edge_faces=self.edge_faces,
+                    face_offsets=self.face_offsets, face_verts=self.face_verts, face_half_edges=self.face_half_edges,
+                    rot_offsets=self.rot_offsets, rot_neighbors=self.rot_neighbors)
+
+    @classmethod
+    def from_arrays(cls, data):
+        return cls(int(data['n_verts']), data['edge_verts'], data['edge_faces'], data['face_offsets'],
+                   data['face_verts'], data['face_half_edges'], data['rot_offsets'], data['rot_neighbors'])
+
+    def save(self, path):
+        # write the lattice to an .npz file
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays(data)
+
+    @property
+    def n_edges(self):
+        return len(self.edge_verts)
+
+    @property
+    def n_faces(self):
+        return len(self.face_offsets) - 1
+
+    def face_sizes(self):
+        # number of edges (= number of half-edges) bounding each face
+        return np.diff(self.face_offsets)
+
+    def face(self, f):
+        # vertex list of face f, as nx traverse_face would return it
+        return self.face_verts[self.face_offsets[f]:self.face_offsets[f + 1]]
+
+    def face_edges(self):
+        # edge index of each entry of face_half_edges
+        return self.face_half_edges // 2
+
+    def degrees(self):
+        return np.bincount(self.edge_verts.ravel(), minlength=self.n_verts)
+
+    def vertex_edge_incidence(self):
+        # B1 (V x E sparse 0/1 matrix) - B1[v, e] = 1 if v is an endpoint of e
+        n_edges = self.n_edges
+        cols = np.repeat(np.arange(n_edges), 2)
+        data = np.ones(2 * n_edges, dtype=np.int64)
+        return sp.csr_matrix((data, (self.edge_verts.ravel(), cols)), shape=(self.n_verts, n_edges))
+
+    def edge_face_incidence(self):
+        # B2 (E x F sparse 0/1 matrix) - B2[e, f] = 1 if e lies on the boundary of f
+        # (a bridge has the same face on both sides and still gets a single 1)
+        n_edges = self.n_edges
+        rows = np.repeat(np.arange(n_edges), 2)
+        data = np.ones(2 * n_edges, dtype=np.int64)
+        B2 = sp.csr_matrix((data, (rows, self.edge_faces.ravel())), shape=(n_edges, self.n_faces))
+        B2.data[:] = 1
+        return B2
+
+
+def _edges_from_adjacency(A):
+    # edges (u, v) with u < v, ordered lexicographically, from a dense or scipy sparse adjacency matrix
+    if sp.issparse(A):
+        A_up = sp.triu(A, k=1).tocoo()
+        keep = A_up.data != 0
+        u, v = A_up.row[keep], A_up.col[keep]
+        order = np.lexsort((v, u))
+        return np.column_stack([u[order], v[order]]).astype(np.int64)
+    A_np = np.asarray(A)
+    u, v = np.nonzero(np.triu(A_np, k=1))
+    return np.column_stack([u, v]).astype(np.int64)
+
+
+def rotation_arrays(embedding, n):
+    # rotation system as arrays (rot_offsets, rot_neighbors): the neighbors of v in clockwise
+    # order are rot_neighbors[rot_offsets[v]:rot_offsets[v + 1]]
+    # embedding is either such a pair already, a FaceLattice or an nx.PlanarEmbedding
+    if isinstance(embedding, tuple):
+        return embedding
+    if isinstance(embedding, FaceLattice):
+        return embedding.rot_offsets, embedding.rot_neighbors
+    rot_offsets = [0]
+    rot_neighbors = []
+    for w in range(n):
+        if w in embedding and len(embedding[w]) > 0:
+            rot_neighbors.extend(embedding.neighbors_cw_order(w))
+        rot_offsets.append(len(rot_neighbors))
+    return np.asarray(rot_offsets, dtype=np.int64), np.asarray(rot_neighbors, dtype=np.int64)
+
+
+def _next_half_edge(n, edge_verts, rot_offsets, rot_neighbors):
+    # for every half-edge h = (a -> b) return the half-edge that follows it on its face,
+    # (b -> c) where c comes right after a in the ccw rotation around b
+    # (this is the rule nx.PlanarEmbedding.traverse_face uses)
+    n_edges = len(edge_verts)
+    tails = np.empty(2 * n_edges, dtype=np.int64)
+    heads = np.empty(2 * n_edges, dtype=np.int64)
+    tails[0::2] = edge_verts[:, 0]
+    heads[0::2] = edge_verts[:, 1]
+    tails[1::2] = edge_verts[:, 1]
+    heads[1::2] = edge_verts[:, 0]
+
+    # look up half-edges by (tail, head)
+    keys = tails * n + heads
+    key_order = np.argsort(keys)
+    sorted_keys = keys[key_order]
+
+    def half_edge_ids(a, b):
+        return key_order[np.searchsorted(sorted_keys, a * n + b)]
+
+    # ccw successor of each neighbor in the rotation around each vertex:
+    # the neighbor before it in clockwise order, cyclically
+    rot_degree = np.diff(rot_offsets)
+    rot_tail = np.repeat(np.arange(n), rot_degree)
+    rot_pos = np.arange(len(rot_neighbors)) - rot_offsets[rot_tail]
+    rot_ccw = rot_neighbors[rot_offsets[rot_tail] + (rot_pos - 1) % rot_degree[rot_tail]]
+
+    # ccw[h] for h = (b -> a) is the c that follows a around b
+    ccw = np.empty(2 * n_edges, dtype=np.int64)
+    ccw[half_edge_ids(rot_tail, rot_neighbors)] = rot_ccw
+
+    # next of (a -> b) is (b -> ccw(b -> a)); (b -> a) is the twin h ^ 1
+    twins = np.arange(2 * n_edges) ^ 1
+    return half_edge_ids(heads, ccw[twins]), tails
+
+
+def planar_face_lattice(A, embedding=None):
+    # input:
+    # A (numpy array or scipy sparse matrix) - the Adjacency Matrix of the desired graph. Must be a planar graph.
+    # embedding (nx.PlanarEmbedding, (rot_offsets, rot_neighbors) arrays or FaceLattice, optional) - planar embedding of the graph
+    # (e.g. the rotation system read from planar_code); computed with nx.check_planarity if not given
+    # returns:
+    # lattice (FaceLattice) - vertex/edge/face incidences of the embedded graph as NumPy index arrays
+    # (the given FaceLattice itself, if embedding is one)
+    if isinstance(embedding, FaceLattice):
+        return embedding
+
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    edge_verts = _edges_from_adjacency(A)
+
+    if embedding is None:
+        with phase('check_planarity'):
+            G_nx = nx.from_scipy_sparse_array(A) if sp.issparse(A) else nx.Graph(np.asarray(A))
+            is_planar, embedding = nx.check_planarity(G_nx)
+        if not is_planar:
+            raise ValueError("graph is not planar")
+    rot_offsets, rot_neighbors = rotation_arrays(embedding, n)
+
+    n_half = 2 * len(edge_verts)
+    with phase('face_traversal'):
+        next_half, tails = _next_half_edge(n, edge_verts, rot_offsets, rot_neighbors)
+
+        # walk every face once, marking its half-edges as visited
+        next_list = next_half.tolist()
+        half_face = [-1] * n_half
+        face_half_edges = []
+        face_offsets = [0]
+        n_faces = 0
+        for start in range(n_half):
+            if half_face[start] != -1:
+                continue
+            h = start
+            while half_face[h] == -1:
+                half_face[h] = n_faces
+                face_half_edges.append(h)
+                h = next_list[h]
+            face_offsets.append(len(face_half_edges))
+            n_faces += 1
+
+        face_offsets = np.asarray(face_offsets, dtype=np.int64)
+        face_half_edges = np.asarray(face_half_edges, dtype=np.int64)
+        face_verts = tails[face_half_edges]
+        edge_faces = np.asarray(half_face, dtype=np.int64).reshape(-1, 2)
+    count('faces_traversed', n_faces)
+    count('half_edges_visited', n_half)
+
+    return FaceLattice(n, edge_verts, edge_faces, face_offsets, face_verts, face_half_edges, rot_offsets, rot_neighbors)
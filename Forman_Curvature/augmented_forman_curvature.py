@@ -0,0 +1,80 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Curvature_Results.curvature_results import EdgeCurvature
+from Instrumentation.instrumentation import phase, count
+
+# Augmented Forman curvature of an arbitrary (not necessarily planar) graph, whose 2-cells are
+# its triangles and, optionally, its 4-cycles.
+#
+# With #(faces containing e) + #(vertices of e) - #(parallel neighbors of e) as for the planar
+# graphs, every triangle on e = (u, v) is a face of e whose two other edges touch e, and every
+# 4-cycle on e is a face whose opposite edge is parallel to e, so
+#   F(e) = 4 - deg(u) - deg(v) + 3 t(e)            (triangles)
+#   F(e) = 4 - deg(u) - deg(v) + 3 t(e) + 2 q(e)   (triangles and 4-cycles)
+# with t(e) = (A^2)[u, v] the number of triangles and q(e) = (A^3)[u, v] - deg(u) - deg(v) + 1
+# the number of 4-cycles through e (the usual augmentation, which counts an edge sharing
+# several cells with e once per cell).
+#
+# The products are taken on row blocks of the sparse adjacency matrix, so memory is bounded
+# by the rows of A^2 (and A^3) of one block. Edge weights are ignored.
+
+
+def _on_block_pattern(P, block):
+    # entries of the product P at the nonzeros of block (a 0/1 csr matrix with sorted indices),
+    # in the order of block.data; adding block makes the pattern exactly that of block
+    on_edges = (P.multiply(block) + block).tocsr()
+    on_edges.sort_indices()
+    return on_edges.data - 1
+
+
+def augmented_forman_arrays(A, quadrangles=False, block_rows=4096):
+    # input:
+    # A (numpy array or scipy sparse matrix) - Adjacency Matrix of the graph (any graph, weights are ignored)
+    # quadrangles (bool) - also count 4-cycles as 2-cells
+    # block_rows (int) - rows of A multiplied at a time
+    # returns:
+    # edges_u, edges_v (numpy arrays) - the edges, edges_u < edges_v, in lexicographic order
+    # forman_curv (numpy array) - augmented Forman curvature of each edge
+    A = sp.csr_matrix(A, dtype=np.int64)
+    A.data[:] = 1
+    A.eliminate_zeros()
+    A.sort_indices()
+    n = A.shape[0]
+    degree = np.diff(A.indptr)
+
+    edges_u = []
+    edges_v = []
+    values = []
+    with phase('augmented_forman_blocks'):
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            block = A[start:stop]
+            rows = np.repeat(np.arange(start, stop), np.diff(block.indptr))
+            cols = block.indices
+            upper = cols > rows
+
+            A2 = block @ A
+            triangles = _on_block_pattern(A2, block)[upper]
+            rows, cols = rows[upper], cols[upper]
+            curv = 4 - degree[rows] - degree[cols] + 3 * triangles
+            if quadrangles:
+                A3 = A2 @ A
+                curv += 2 * (_on_block_pattern(A3, block)[upper] - degree[rows] - degree[cols] + 1)
+            count('augmented_forman_rows', stop - start)
+
+            edges_u.append(rows)
+            edges_v.append(cols)
+            values.append(curv)
+
+    if not values:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(edges_u), np.concatenate(edges_v), np.concatenate(values)
+
+
+def augmented_forman(A, quadrangles=False, block_rows=4096):
+    # input: as in augmented_forman_arrays
+    # returns: forman_curv (EdgeCurvature) - augmented Forman curvature of each edge
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    return EdgeCurvature(n, *augmented_forman_arrays(A, quadrangles, block_rows))
@@ -0,0 +1,183 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Forman_Curvature.forman_curvature_3polytope_graph import forman_from_incidences
+from Curvature_Results.curvature_results import EdgeCurvature
+from Instrumentation.instrumentation import phase, count
+
+# Vertices, edges and 2-faces of a d-polytope from its vertex-facet incidences, without Sage.
+#
+# Every face is the intersection of the facets containing it, so a set S of vertices spans
+# the face closure(S) = vertices lying on every facet that contains S. Incidences are packed
+# into uint64 bitsets (one row per vertex over the facets, one row per facet over the
+# vertices) and closures are ANDs of those rows:
+# - {u, v} is an edge exactly when closure({u, v}) = {u, v};
+# - the 2-faces containing an edge e are the minimal sets among closure(e + {w}), w not in e,
+#   and closure(e + {w}) is minimal exactly when every x in it but not in e has the same closure.
+# Forman curvature and the p-vector then follow as for the planar graphs
+# (forman_curvature_3polytope_graph.forman_from_incidences).
+#
+# Vertices are numbered as the rows of the incidence matrix, edges (u, v) with u < v
+# lexicographically, 2-faces in order of first appearance.
+
+
+def pack_bits(M):
+    # input: M (k x m bool array)
+    # returns: bits (k x ceil(m / 64) uint64 array), bit j of row i set when M[i, j]
+    M = np.asarray(M, dtype=bool)
+    n_words = max(1, -(-M.shape[1] // 64))
+    padded = np.zeros((M.shape[0], n_words * 64), dtype=bool)
+    padded[:, :M.shape[1]] = M
+    return np.packbits(padded, axis=1, bitorder='little').view(np.uint64)
+
+
+def unpack_bits(bits, m):
+    # inverse of pack_bits
+    return np.unpackbits(bits.view(np.uint8), axis=-1, count=m, bitorder='little').astype(bool)
+
+
+def popcount(bits):
+    # number of set bits in each row
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+    return unpack_bits(bits, bits.shape[-1] * 64).sum(axis=-1)
+
+
+def incidence_from_points(points, facets=None, tol=1e-9):
+    # input:
+    # points (n x d array) - the vertices of a full-dimensional polytope (all in convex position)
+    # facets (list of lists, optional) - vertex indices of each facet; computed from the convex hull if not given
+    # tol (float) - largest difference between the (scaled) hyperplane equations of two hull simplices on one facet
+    # returns: incidence (n x m bool array) vertex-facet incidence matrix
+    points = np.asarray(points, dtype=float)
+    if facets is not None:
+        incidence = np.zeros((len(points), len(facets)), dtype=bool)
+        for f, verts in enumerate(facets):
+            incidence[verts, f] = True
+        return incidence
+
+    from scipy.spatial import ConvexHull
+    from scipy.sparse.csgraph import connected_components
+    hull = ConvexHull(points)
+    if len(hull.vertices) != len(points):
+        raise ValueError("every point must be a vertex of the convex hull")
+    # the hull triangulates the facets: merge neighboring simplices on the same hyperplane
+    n_simplices, d = hull.simplices.shape
+    scale = max(np.max(np.abs(points)), 1)
+    eq = hull.equations / np.array([1] * points.shape[1] + [scale])
+    t = np.repeat(np.arange(n_simplices), d)
+    s = hull.neighbors.ravel()
+    same_plane = np.all(np.abs(eq[t] - eq[s]) <= tol, axis=1)
+    adjacency = sp.csr_matrix((np.ones(same_plane.sum()), (t[same_plane], s[same_plane])), shape=(n_simplices, n_simplices))
+    n_facets, facet_of = connected_components(adjacency, directed=False)
+    incidence = np.zeros((len(points), n_facets), dtype=bool)
+    incidence[hull.simplices.ravel(), np.repeat(facet_of, d)] = True
+    return incidence
+
+
+def _closures(facet_verts_bits, vert_facet_mask, candidate_facets, all_verts):
+    # closure of S + {w} for every vertex w, where candidate_facets are the facets containing S:
+    # AND of the vertex sets of the candidate facets that also contain w
+    closure = np.broadcast_to(all_verts, (vert_facet_mask.shape[0], len(all_verts))).copy()
+    for f in candidate_facets:
+        on_f = vert_facet_mask[:, f]
+        closure[on_f] &= facet_verts_bits[f]
+    return closure
+
+
+class BitsetFaceLattice:
+    # n_verts (int), n_facets (int)
+    # edge_verts (E x 2 int array) - the two vertices (u < v) of each edge
+    # face_verts (list of int arrays) - vertices of each 2-face
+    # edge_faces (list of int arrays) - 2-faces containing each edge
+
+    def __init__(self, incidence):
+        # incidence (n x m bool array) vertex-facet incidence matrix of a polytope, e.g. from incidence_from_points
+        incidence = np.asarray(incidence, dtype=bool)
+        n, m = incidence.shape
+        self.n_verts = n
+        self.n_facets = m
+        vert_facet_bits = pack_bits(incidence)
+        facet_verts_bits = pack_bits(incidence.T)
+        all_verts = pack_bits(np.ones((1, n), dtype=bool))[0]
+        vert_bits = pack_bits(np.eye(n, dtype=bool))
+
+        with phase('bitset_edges'):
+            edges = []
+            for u in range(n):
+                facets_u = np.flatnonzero(incidence[u])
+                closure = _closures(facet_verts_bits, incidence, facets_u, all_verts)
+                shares_a_facet = popcount(vert_facet_bits & vert_facet_bits[u]) > 0
+                # closure({u, v}) = {u, v}
+                is_edge = (popcount(closure) == 2) & shares_a_facet
+                is_edge[:u + 1] = False
+                edges += [(u, v) for v in np.flatnonzero(is_edge)]
+            self.edge_verts = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        count('closures', n)
+
+        with phase('bitset_2faces'):
+            face_index = {}
+            face_verts = []
+            edge_faces = []
+            for u, v in self.edge_verts.tolist():
+                facets_e = np.flatnonzero(incidence[u] & incidence[v])
+                closure = _closures(facet_verts_bits, incidence, facets_e, all_verts)
+                edge_bits = vert_bits[u] | vert_bits[v]
+                closure[[u, v]] = edge_bits
+                # group the vertices w by closure(e + {w}); a group is a 2-face when its closure
+                # holds no vertex outside e with a different closure
+                groups, inverse = np.unique(closure, axis=0, return_inverse=True)
+                inverse = inverse.ravel()
+                faces_e = []
+                for g, group_bits in enumerate(groups):
+                    if np.array_equal(group_bits, edge_bits):
+                        continue
+                    members = unpack_bits(group_bits & ~edge_bits, n)
+                    if np.all(inverse[members] == g):
+                        key = group_bits.tobytes()
+                        if key not in face_index:
+                            face_index[key] = len(face_verts)
+                            face_verts.append(np.flatnonzero(unpack_bits(group_bits, n)))
+                        faces_e.append(face_index[key])
+                edge_faces.append(np.array(sorted(faces_e), dtype=np.int64))
+            self.face_verts = face_verts
+            self.edge_faces = edge_faces
+        count('closures', len(self.edge_verts))
+
+    @property
+    def n_edges(self):
+        return len(self.edge_verts)
+
+    @property
+    def n_faces(self):
+        return len(self.face_verts)
+
+    def vertex_edge_incidence(self):
+        # B1 (n x E scipy csr matrix)
+        E = self.n_edges
+        rows = self.edge_verts.T.ravel()
+        cols = np.tile(np.arange(E), 2)
+        return sp.csr_matrix((np.ones(2 * E, dtype=np.int64), (rows, cols)), shape=(self.n_verts, E))
+
+    def edge_face_incidence(self):
+        # B2 (E x F scipy csr matrix)
+        rows = np.repeat(np.arange(self.n_edges), [len(f) for f in self.edge_faces])
+        cols = np.concatenate(self.edge_faces) if self.edge_faces else np.zeros(0, dtype=np.int64)
+        return sp.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(self.n_edges, self.n_faces))
+
+
+def bitset_forman(incidence):
+    # input: incidence (n x m bool array) vertex-facet incidence matrix of a polytope
+    # returns: forman_curv (EdgeCurvature) Forman curvature of each edge, as forman_curvature_sagemath.forman
+    lattice = BitsetFaceLattice(incidence)
+    with phase('forman_sparse_products'):
+        values = forman_from_incidences(lattice.vertex_edge_incidence(), lattice.edge_face_incidence())
+    return EdgeCurvature(lattice.n_verts, lattice.edge_verts[:, 0], lattice.edge_verts[:, 1], values)
+
+
+def bitset_p_vector(incidence):
+    # input: incidence (n x m bool array) vertex-facet incidence matrix of a polytope
+    # returns: p_vector (list) (p_3, p_4, ...) numbers of k-gonal 2-faces, as p_k_vector_sagemath.i_sided_2faces
+    lattice = BitsetFaceLattice(incidence)
+    num_i_sides = np.bincount([len(f) for f in lattice.face_verts])
+    return [int(num_i_sides[i]) for i in range(3, len(num_i_sides))]
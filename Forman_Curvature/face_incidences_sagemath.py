@@ -0,0 +1,62 @@
+import numpy as np
+from sage.all import CombinatorialPolyhedron
+
+from Instrumentation.instrumentation import phase, count
+
+def face_incidences(poly):
+    # input:
+    # poly (Sage polytope object)
+    # output:
+    # incidences (dictionary) with
+    #   'index_first_edge', 'index_first_face' - face lattice indices of the first edge and the first 2-face
+    #   'edge_verts' - dict, for each edge, of its two vertices
+    #   'edge_faces' - dict, for each edge, of the 2-faces containing it
+    #   'vert_edges' - dict, for each vertex, of the edges containing it
+    #   'face_edges' - dict, for each 2-face, of the edges it contains
+    # (all keys and entries are face lattice indices)
+    # The incidences are the cover relations of the face lattice, read in one bulk query
+    # (the Hasse diagram) instead of constructing every vertex, edge and 2-face.
+
+    f_vec = poly.f_vector()
+
+    n_verts = f_vec[1]
+    n_edges = f_vec[2]
+    n_faces = f_vec[3]
+
+    with phase('face_incidences'):
+        c_poly = CombinatorialPolyhedron(poly)
+
+        index_first_edge = n_verts + 1
+        index_first_face = index_first_edge + n_edges
+        index_end_face = index_first_face + n_faces
+
+        # pairs (subface, face) of lattice indices one dimension apart; faces are numbered by
+        # dimension, so the smaller index of a pair is the subface
+        arcs = np.array(c_poly.hasse_diagram().edges(labels=False, sort=False), dtype=np.int64).reshape(-1, 2)
+        arcs = np.sort(arcs, axis=1)
+        arcs = arcs[np.lexsort((arcs[:, 1], arcs[:, 0]))]
+        low, high = arcs[:, 0], arcs[:, 1]
+
+        edge_verts = {i: [] for i in range(index_first_edge, index_first_face)}
+        vert_edges = {h: [] for h in range(1, n_verts + 1)}
+        at_vertex = (low >= 1) & (high >= index_first_edge) & (high < index_first_face)
+        for h, i in arcs[at_vertex].tolist():
+            edge_verts[i].append(h)
+            vert_edges[h].append(i)
+
+        edge_faces = {i: [] for i in edge_verts}
+        face_edges = {k: [] for k in range(index_first_face, index_end_face)}
+        in_face = (low >= index_first_edge) & (high >= index_first_face) & (high < index_end_face)
+        for i, k in arcs[in_face].tolist():
+            face_edges[k].append(i)
+            edge_faces[i].append(k)
+    count('lattice_incidences', len(arcs))
+
+    return {
+        'index_first_edge': index_first_edge,
+        'index_first_face': index_first_face,
+        'edge_verts': edge_verts,
+        'edge_faces': edge_faces,
+        'vert_edges': vert_edges,
+        'face_edges': face_edges,
+    }
@@ -1,168 +1,104 @@
 import numpy as np
-import networkx as nx
+import scipy.sparse as sp
+
+from Face_Lattice.planar_face_lattice import planar_face_lattice
+from Effective_Resistance_Curvatures.sparse_resistance import group_ranges
+from Instrumentation.instrumentation import phase
+from Curvature_Results.curvature_results import EdgeCurvature
+
+# Forman Ricci curvature of an edge e of a planar graph embedded in the sphere:
+# #(faces containing e) + #(vertices of e) - #(parallel neighbors of e)
+# where a parallel neighbor of e shares a face with e but no vertex, or a vertex but no face.
+# Everything is computed for all edges at once from the sparse incidence matrices
+# B1 (vertex-edge) and B2 (edge-face) of the face lattice (forman_from_incidences, which
+# also serves the 2-faces of higher dimensional polytopes, see bitset_face_lattice).
+# A non-planar graph raises ValueError; augmented_forman_curvature handles any graph,
+# with its triangles (and 4-cycles) as 2-cells.
+
+def forman_from_incidences(B1, B2):
+  # input:
+  # B1 (scipy sparse matrix) - vertex-edge incidence matrix (n x E, entries 0/1)
+  # B2 (scipy sparse matrix) - edge-face incidence matrix (E x F, entries 0/1)
+  # returns:
+  # forman_curv (numpy array) - Forman curvature of each edge
+    n, E = B1.shape
+    # the two endpoints of each edge
+    B1c = sp.csc_matrix(B1)
+    B1c.sort_indices()
+    ends = B1c.indices.reshape(E, 2)
+    B2c = sp.coo_matrix(B2)
+    on = B2c.data != 0
+    e_of, f_of = B2c.row[on], B2c.col[on]
+
+    n_faces_of_e = np.bincount(e_of, minlength=E)
+    n_verts_of_e = np.asarray(B1.sum(axis=0)).ravel()
+    edges_per_face = np.bincount(f_of, minlength=B2.shape[1])
+
+    # (face, vertex, edge) triples: edge e of face f at its endpoint x, grouped by (f, x).
+    # Only these are ever expanded, never an edge x edge matrix (B1^T B1 or B2 B2^T), whose
+    # size is quadratic in the largest degree and the largest face.
+    x = ends[e_of].ravel()
+    e3 = np.repeat(e_of, 2)
+    key = np.repeat(f_of, 2).astype(np.int64) * n + x
+    order = np.argsort(key, kind='stable')
+    key, e3, x = key[order], e3[order], x[order]
+    starts = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1]]))
+    sizes = np.diff(np.concatenate([starts, [len(key)]]))
+    size_of = np.repeat(sizes, sizes)
+
+    # edges lying on a face f of e but sharing no vertex with e (counted once per face of e):
+    # the edges of f touching e are those of f at u plus those of f at v, e counted twice
+    touching = np.zeros(E, dtype=np.int64)
+    np.add.at(touching, e3, size_of)
+    face_parallel = B2 @ edges_per_face - touching + n_faces_of_e
+
+    # edges at a vertex of e sharing no face with e (counted once per vertex of e): every
+    # (e, f, x) with e, f on a common face and x a common vertex is one pair of edges of that
+    # face at x; pairs found on several faces are counted once
+    first = np.repeat(starts, sizes)
+    pair_i = np.repeat(np.arange(len(key)), size_of)
+    pair_j = group_ranges(first, size_of)
+    triples = np.stack([e3[pair_i], e3[pair_j], x[pair_i]])
+    triples = triples[:, np.lexsort(triples[::-1])]
+    distinct = np.concatenate([[True], np.any(triples[:, 1:] != triples[:, :-1], axis=0)]) if triples.shape[1] else np.zeros(0, dtype=bool)
+    shared_vert_face = np.bincount(triples[0, distinct], minlength=E)
+    degree = np.asarray(B1.sum(axis=1)).ravel()
+    vert_parallel = degree[ends].sum(axis=1) - shared_vert_face
+
+    forman_curv = n_faces_of_e + n_verts_of_e - face_parallel - vert_parallel
+
+    return forman_curv
+
+
+def forman_arrays(graph, embedding=None):
+  # input:
+  # graph (numpy array or scipy sparse matrix) - the Adjacency Matrix of the desired graph. Must be a planar graph to run this code, and 3-polyhedral graphs are also 3-vertex connected.
+  # embedding (optional) - planar embedding, rotation system or FaceLattice of the graph (see planar_face_lattice and embedding_cache.planar_embedding)
+  # returns:
+  # edges_u (numpy array) - first vertex of each edge
+  # edges_v (numpy array) - second vertex of each edge (edges_u < edges_v)
+  # forman_curv (numpy array) - Forman curvature of each edge
+    lattice = planar_face_lattice(graph, embedding)
+
+    with phase('forman_sparse_products'):
+        forman_curv = forman_from_incidences(lattice.vertex_edge_incidence(), lattice.edge_face_incidence())
+
+    return lattice.edge_verts[:, 0], lattice.edge_verts[:, 1], forman_curv
+
+
+def forman_result(graph, embedding=None):
+  # input: as in forman_arrays
+  # returns: forman_curv (EdgeCurvature) - Forman curvature of each edge, see Curvature_Results.curvature_results
+    edges_u, edges_v, forman_curv = forman_arrays(graph, embedding)
+    n = graph.shape[0] if hasattr(graph, 'shape') else len(graph)
+    return EdgeCurvature(n, edges_u, edges_v, forman_curv)
+
 
-def forman(graph):
+def forman(graph, embedding=None):
   # input:
-  # graph (numpy array) - the Adjacency Matrix of the desired graph. Must be a planar graph to run this code, and 3-polyhedral graphs are also 3-vertex connected.
+  # graph (numpy array or scipy sparse matrix) - the Adjacency Matrix of the desired graph. Must be a planar graph to run this code, and 3-polyhedral graphs are also 3-vertex connected.
+  # embedding (optional) - planar embedding, rotation system or FaceLattice of the graph (see planar_face_lattice and embedding_cache.planar_embedding)
   # returns:
-  # forman_dict (dictionary) - each key is an edge (indexed by its position in the poset constructed within this function) and the value is the edge's Forman curvature.
-    forman_dict = {} # keys are edges, values are its forman ricci curvature
-    
-    # construct face lattice 
-    G_nx = nx.Graph(graph)
-
-    # Check if the graph is planar and get the planar embedding
-    # networkx
-    is_planar, embedding_nx = nx.check_planarity(G_nx)
-
-    # Construct poset of 1-skeleton
-    # add vertices
-    vert_elms = [] # a list 1,...,n
-
-    for i in range(1, len(graph[0]) + 1):
-        vert_elms = vert_elms + [i]
-
-    # add edges
-    edge_elms = []
-    edge_dict = {} # keys are edge indices, values are the indicestwo vertices it contains
-
-    # and relations
-    relations = []
-
-    for vert in vert_elms:
-        vert_mat_index = vert - 1
-
-        neighbors = [] # poset indices of neighbors
-        for j in range(len(graph[0])):
-            if graph[vert_mat_index][j] == 1:
-                neighbors = neighbors + [j + 1]
-
-        for buddy in neighbors:
-            if vert < buddy:
-                if len(edge_elms) == 0:
-                    edge_elms = edge_elms + [vert_elms[-1] + 1]
-                    edge_dict[edge_elms[-1]] = [vert, buddy]
-                    relations = relations + [[vert, edge_elms[-1]]] + [[buddy, edge_elms[-1]]]
-                else: 
-                    edge_elms = edge_elms + [edge_elms[-1] + 1]
-                    edge_dict[edge_elms[-1]] = [vert, buddy]
-                    relations = relations + [[vert, edge_elms[-1]]] + [[buddy, edge_elms[-1]]]
-
-    # add faces
-    face_elms = []
-    face_dict = {} # key is the index of a face (in the poset lattice), feature is the first nx vertex list we find 
-
-    for edge in edge_dict:
-        # Take in an edge, traverse its face to see which vertices are contained.
-        two_vert_indices = edge_dict[edge]
-        two_verts = []
-        for i in two_vert_indices:
-            two_verts = two_verts + [i-1]
-
-        # first half-edge
-        f1_vert_list = list(embedding_nx.traverse_face(v=two_verts[0], w=two_verts[1]))
-
-        # test if this face has been accounted for yet
-        test_face1 = []
-        for face in face_dict:
-            already_found_face = face_dict[face]
-            if sorted(f1_vert_list) == sorted(already_found_face):
-                test_face1 = test_face1 + [1]
-                # if this face has already been acknowledged, take its index and add a relation
-                relations = relations + [ [edge, face] ]
-
-        # if this face has not been accounted for yet, add it to the dict / poset element list
-        if len(test_face1) == 0:
-            if len(face_elms) == 0:
-                face_elms = face_elms + [edge_elms[-1] + 1]
-                face_dict[face_elms[-1]] = f1_vert_list
-                relations = relations + [ [edge, face_elms[-1]] ]
-            else:
-                face_elms = face_elms + [face_elms[-1] + 1]
-                face_dict[face_elms[-1]] = f1_vert_list
-                relations = relations + [ [edge, face_elms[-1]] ]
-
-        # second half-edge
-        f2_vert_list = list(embedding_nx.traverse_face(v=two_verts[1], w=two_verts[0]))
-
-        # test if this face has been accounted for yet
-        test_face2 = []
-        for face in face_dict:
-            already_found_face = face_dict[face]
-            if sorted(f2_vert_list) == sorted(already_found_face):
-                test_face2 = test_face2 + [1]
-                # if this face has already been acknowledged, take its index and add a relation
-                relations = relations + [ [edge, face] ]
-
-        # if this face has not been accounted for yet, add it to the dict / poset element list
-        if len(test_face2) == 0:
-            if len(face_elms) == 0:
-                face_elms = face_elms + [edge_elms[-1] + 1]
-                face_dict[face_elms[-1]] = f2_vert_list
-                relations = relations + [ [edge, face_elms[-1]] ]
-            else:
-                face_elms = face_elms + [face_elms[-1] + 1]
-                face_dict[face_elms[-1]] = f2_vert_list
-                relations = relations + [ [edge, face_elms[-1]] ]
-
-    # Construct new poset
-    total_elms = vert_elms + edge_elms + face_elms
-
-    comb_poly_poset = Poset((total_elms, relations))
-    
-    # Now compute Forman Ricci curvature from this poset!
-    n_verts = len(vert_elms)
-    n_edges = len(edge_elms)
-    n_faces = len(face_elms)
-    
-    index_first_edge = edge_elms[0]
-    index_last_edge = edge_elms[-1]
-    
-    index_first_face = face_elms[0]
-    index_last_face = face_elms[-1]
-    
-    # pick an edge
-    for edge in range(index_first_edge, index_last_edge + 1):  
-        # pick out which faces the edge is contained in 
-        faces_to_check = []
-        for k in range(index_first_face, index_last_face + 1):
-            if comb_poly_poset.compare_elements(edge,k) == -1:
-                faces_to_check = faces_to_check + [k]
-    
-        # pick out which vertices e contains
-        verts_to_check = []
-        for h in range(1, n_verts + 1):
-            if comb_poly_poset.compare_elements(h,edge) == -1:
-                verts_to_check = verts_to_check + [h]
-            if len(verts_to_check) == 2:
-                break
-        
-        # pick out relevant other edges to check
-        # edges that share a face with e
-        share_a_face = []
-        for f in faces_to_check:
-            for j in range(index_first_edge, index_last_edge + 1):
-                if comb_poly_poset.compare_elements(j,f) == -1:
-                    share_a_face = share_a_face + [j]
-        
-        # edges that share a vertex with e
-        share_a_vert = []
-        for v in verts_to_check:
-            for j in range(index_first_edge, index_last_edge + 1):
-                if comb_poly_poset.compare_elements(v,j) == -1:
-                    share_a_vert = share_a_vert + [j]
-        
-        # examine relationship between e and other edges
-        e_parallel_neighbor_vec = []
-        for o in share_a_face:
-            if o not in share_a_vert:
-                e_parallel_neighbor_vec = e_parallel_neighbor_vec + [o]
-        for q in share_a_vert:
-            if q not in share_a_face:
-                e_parallel_neighbor_vec = e_parallel_neighbor_vec + [q]
-        
-        # count everything up and add it to the dict!
-        forman_curv = len(faces_to_check) + len(verts_to_check) - len(e_parallel_neighbor_vec)
-        forman_dict[edge] = forman_curv
-        
-    return(forman_dict)        
+  # forman_dict (dictionary) - each key is an edge (indexed by its position in the poset of vertices, edges and faces) and the value is the edge's Forman curvature.
+  # (forman_result gives the same values as arrays, with the edges as vertex pairs)
+    return forman_result(graph, embedding).to_poset_dict()
@@ -1,3 +1,5 @@
+from Forman_Curvature.face_incidences_sagemath import face_incidences
+
 def forman(poly):
     # input:
     # poly (Sage polytope object)
@@ -6,68 +8,43 @@ def forman(poly):
     
     forman_dict = {}
     
-    f_vec = poly.f_vector()
-    
-    n_verts = f_vec[1]
-    n_edges = f_vec[2]
-    n_faces = f_vec[3]
-    
-    c_poly = CombinatorialPolyhedron(poly)
-    
-    index_first_edge = n_verts + 1
-    index_last_edge = index_first_edge + n_edges - 1
-    
-    index_first_face = index_last_edge + 1
-    index_last_face = index_first_face + n_faces - 1
+    # vertex-edge and edge-face incidences, built once for the whole polytope
+    incidences = face_incidences(poly)
+    edge_verts = incidences['edge_verts']
+    edge_faces = incidences['edge_faces']
+    vert_edges = incidences['vert_edges']
+    face_edges = incidences['face_edges']
     
     # pick an edge
-    for i in range(index_first_edge, index_last_edge + 1):
-        e = c_poly.face_by_face_lattice_index(i)
-        
-        # pick out which faces e is contained in 
-        faces_to_check = []
-        for k in range(index_first_face, index_last_face + 1):
-            face = c_poly.face_by_face_lattice_index(k)
-            if e.is_subface(face):
-                faces_to_check = faces_to_check + [k]
+    for i in edge_verts:
+        # which faces e is contained in, and which vertices e contains
+        faces_to_check = edge_faces[i]
+        verts_to_check = edge_verts[i]
         
-        # pick out which vertices e contains
-        verts_to_check = []
-        for h in range(1, n_verts + 1):
-            vertex = c_poly.face_by_face_lattice_index(h)
-            if vertex.is_subface(e):
-                verts_to_check = verts_to_check + [h]
-                
         # pick out relevant other edges to check
         # edges that share a face with e
         share_a_face = []
         for f in faces_to_check:
-            face = c_poly.face_by_face_lattice_index(f)
-            for j in range(index_first_edge, index_last_edge + 1):
-                other_edge = c_poly.face_by_face_lattice_index(j)
-                if other_edge.is_subface(face):
-                    share_a_face = share_a_face + [j]
+            share_a_face += face_edges[f]
         
         # edges that share a vertex with e
         share_a_vert = []
         for v in verts_to_check:
-            vertex = c_poly.face_by_face_lattice_index(v)
-            for j in range(index_first_edge, index_last_edge + 1):
-                other_edge = c_poly.face_by_face_lattice_index(j)
-                if vertex.is_subface(other_edge):
-                    share_a_vert = share_a_vert + [j]
+            share_a_vert += vert_edges[v]
         
         # examine relationship between e and other edges
-        e_parallel_neighbor_vec = []
+        share_a_face_set = set(share_a_face)
+        share_a_vert_set = set(share_a_vert)
+        n_parallel = 0
         for o in share_a_face:
-            if o not in share_a_vert:
-                e_parallel_neighbor_vec = e_parallel_neighbor_vec + [o]
+            if o not in share_a_vert_set:
+                n_parallel += 1
         for q in share_a_vert:
-            if q not in share_a_face:
-                e_parallel_neighbor_vec = e_parallel_neighbor_vec + [q]
+            if q not in share_a_face_set:
+                n_parallel += 1
         
         # count everything up and add it to the dict!
-        forman_curv = len(faces_to_check) + len(verts_to_check) - len(e_parallel_neighbor_vec)
+        forman_curv = len(faces_to_check) + len(verts_to_check) - n_parallel
         forman_dict[i] = forman_curv
         
     return(forman_dict)        
@@ -0,0 +1,58 @@
+import hashlib
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.sparse_resistance import edge_list
+
+# Keys and files shared by the caches of per-graph results: the embedding cache
+# (Face_Lattice.embedding_cache), the on-disk result cache (Curvature_Pipeline.result_cache)
+# and the in-memory resistance contexts (Effective_Resistance_Curvatures.resistance_context).
+#
+# graph_key hashes the labeled, weighted edge set, so it is the same for dense and sparse
+# inputs of one graph, together with the parameters the cached value depends on (the
+# embedding, the solve mode, ...). It is deliberately not a canonical form (or a WL hash):
+# the results are per vertex and per edge, and are only valid for the labeling they were
+# computed with.
+#
+# save_npz_atomic writes an on-disk entry under a temporary name (<name>.<pid>.tmp.npz, which
+# the caches skip when listing entries) and renames it into place, so a crash never leaves a
+# truncated entry behind.
+
+
+def _update(h, param):
+    # feed one parameter (None, a scalar, a string, a numpy array or a tuple of these) to h
+    if isinstance(param, tuple):
+        h.update(b'(%d' % len(param))
+        for p in param:
+            _update(h, p)
+        h.update(b')')
+    elif isinstance(param, np.ndarray):
+        h.update('{}{}'.format(param.dtype.str, param.shape).encode())
+        h.update(np.ascontiguousarray(param).tobytes())
+    else:
+        h.update(repr(param).encode())
+
+
+def graph_key(A, *params):
+    # input:
+    # A (list, numpy array or scipy sparse matrix) Adjacency Matrix (can be weighted)
+    # params - what else the cached value depends on: None, scalars, strings, numpy arrays or tuples of these
+    # returns: key (string) hex digest of the number of vertices, the sorted edge list, the weights and params
+    n = A.shape[0] if sp.issparse(A) else len(A)
+    edges_u, edges_v, weights = edge_list(A)
+    h = hashlib.sha1()
+    h.update(np.int64(n).tobytes())
+    for part in (edges_u, edges_v, weights):
+        h.update(np.ascontiguousarray(part).tobytes())
+    for param in params:
+        _update(h, param)
+    return h.hexdigest()
+
+
+def save_npz_atomic(path, arrays):
+    # write arrays (dictionary of numpy arrays) to the .npz file path, all at once or not at all
+    tmp_path = '{}.{}.tmp.npz'.format(path[:-len('.npz')], os.getpid())
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
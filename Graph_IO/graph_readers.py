@@ -0,0 +1,171 @@
+import mmap
+
+import numpy as np
+import scipy.sparse as sp
+
+# Readers for collections of graphs, straight to sparse adjacency matrices.
+# Each yields (graph_id, A, rotation) triples:
+# graph_id (string) - "<path>:<position in file>"
+# A (scipy csr matrix) - 0/1 adjacency matrix, never formed densely
+# rotation ((rot_offsets, rot_neighbors) arrays or None) - for planar_code, the rotation system
+#   of the embedding (neighbors of v in clockwise order are rot_neighbors[rot_offsets[v]:rot_offsets[v + 1]]),
+#   which the planar curvature functions accept in place of nx.check_planarity; None otherwise
+#
+# formats:
+# 'graph6'      - one graph6 or sparse6 string per line (optional >>graph6<< / >>sparse6<< header)
+# 'planar_code' - plantri's binary planar_code (optional >>planar_code<< header)
+# 'edgelist'    - one graph per file, one edge "u v" per line (vertices 0, ..., n-1)
+#
+# Files are memory-mapped and read one graph at a time.
+
+
+def _csr_from_edges(n, u, v):
+    # symmetric 0/1 csr matrix with the given edges, self-loops and repeated edges dropped
+    keep = u != v
+    u, v = u[keep], v[keep]
+    rows = np.concatenate([u, v])
+    cols = np.concatenate([v, u])
+    A = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    A.data[:] = 1
+    return A
+
+
+def _graph6_size(data):
+    # N(n) of graph6/sparse6: returns n and the number of bytes it took
+    if data[0] < 126:
+        return data[0] - 63, 1
+    if data[1] < 126:
+        return _bits_to_int(data[1:4]), 4
+    return _bits_to_int(data[2:8]), 8
+
+
+def _bits_to_int(data):
+    value = 0
+    for c in data:
+        value = (value << 6) | (c - 63)
+    return value
+
+
+def _six_bit_groups(data):
+    # the bits of a graph6/sparse6 body, 6 per byte, most significant first
+    groups = np.frombuffer(data, dtype=np.uint8) - 63
+    return np.unpackbits(groups[:, None], axis=1)[:, 2:].ravel()
+
+
+def decode_graph6(line):
+    # input: line (bytes) a graph6 string
+    # returns: A (scipy csr matrix)
+    n, start = _graph6_size(line)
+    bits = _six_bit_groups(line[start:])[:n * (n - 1) // 2]
+    # bit k is the pair (i, j), i < j, in the order (0,1), (0,2), (1,2), (0,3), ...
+    k = np.flatnonzero(bits)
+    j = ((1 + np.sqrt(1 + 8 * k)) // 2).astype(np.int64)
+    j[j * (j - 1) // 2 > k] -= 1
+    j[(j + 1) * j // 2 <= k] += 1
+    i = k - j * (j - 1) // 2
+    return _csr_from_edges(n, i, j)
+
+
+def decode_sparse6(line):
+    # input: line (bytes) a sparse6 string, starting with ':'
+    # returns: A (scipy csr matrix)
+    n, start = _graph6_size(line[1:])
+    k = max(1, (n - 1).bit_length())
+    bits = _six_bit_groups(line[1 + start:])
+    n_units = len(bits) // (k + 1)
+    units = bits[:n_units * (k + 1)].reshape(n_units, k + 1)
+    b = units[:, 0].astype(np.int64)
+    x = units[:, 1:].astype(np.int64) @ (1 << np.arange(k - 1, -1, -1, dtype=np.int64))
+
+    # v_t = max(v_{t-1} + b_t, x_t) with v = 0 to start; with c = cumsum(b),
+    # v_t - c_t is the running maximum of 0 and x - c
+    c = np.cumsum(b)
+    w = np.maximum.accumulate(np.maximum(x - c, 0))
+    v_before = c + np.concatenate([[0], w[:-1]])  # v_{t-1} + b_t
+    # stop at the first unit that points past the last vertex (padding)
+    past = np.flatnonzero((x >= n) | (v_before >= n))
+    end = past[0] if len(past) else n_units
+    is_edge = x[:end] <= v_before[:end]
+    return _csr_from_edges(n, x[:end][is_edge], v_before[:end][is_edge])
+
+
+def read_graph6(path):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i, line in enumerate(iter(mm.readline, b'')):
+            line = line.strip()
+            for header in (b'>>graph6<<', b'>>sparse6<<'):
+                if line.startswith(header):
+                    line = line[len(header):]
+            if not line:
+                continue
+            A = decode_sparse6(line) if line.startswith(b':') else decode_graph6(line)
+            yield '{}:{}'.format(path, i), A, None
+
+
+def read_planar_code(path):
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    pos = 0
+    big_endian = False
+    if bytes(data[:13]) == b'>>planar_code':
+        header_end = bytes(data[:64]).index(b'<<') + 2
+        big_endian = b' be' in bytes(data[:header_end])
+        pos = header_end
+    i = 0
+    while pos < len(data):
+        n = int(data[pos])
+        pos += 1
+        dtype = np.uint8
+        if n == 0:
+            # more than 255 vertices: 2 byte entries
+            dtype = np.dtype('>u2' if big_endian else '<u2')
+            n = int(data[pos:pos + 2].view(dtype)[0])
+            pos += 2
+        width = np.dtype(dtype).itemsize
+
+        # find the n zero entries that end the n neighbor lists
+        window = 8 * n
+        while True:
+            stop = min(pos + width * window, len(data))
+            entries = data[pos:pos + (stop - pos) // width * width].view(dtype)
+            zeros = np.flatnonzero(entries == 0)
+            if len(zeros) >= n:
+                break
+            if stop == len(data):
+                raise ValueError("{}: graph {} is truncated".format(path, i))
+            window *= 2
+        entries = np.asarray(entries[:zeros[n - 1] + 1], dtype=np.int64)
+        pos += width * len(entries)
+
+        # neighbor lists in clockwise order, 1-based in the file
+        is_end = entries == 0
+        rot_neighbors = entries[~is_end] - 1
+        rot_offsets = np.concatenate([[0], np.cumsum(np.diff(np.concatenate([[-1], np.flatnonzero(is_end)])) - 1)])
+        rot_tails = np.repeat(np.arange(n), np.diff(rot_offsets))
+        A = sp.csr_matrix((np.ones(len(rot_neighbors)), (rot_tails, rot_neighbors)), shape=(n, n))
+        yield '{}:{}'.format(path, i), A, (rot_offsets, rot_neighbors)
+        i += 1
+
+
+def read_edgelist(path):
+    edges = np.loadtxt(path, dtype=np.int64, ndmin=2)
+    n = int(edges[:, :2].max()) + 1 if len(edges) else 0
+    yield '{}:0'.format(path), _csr_from_edges(n, edges[:, 0], edges[:, 1]), None
+
+
+READERS = {
+    'graph6': read_graph6,
+    'planar_code': read_planar_code,
+    'edgelist': read_edgelist,
+}
+
+
+def read_graphs(paths, fmt):
+    # input:
+    # paths (list of strings) - files to read, in order
+    # fmt (string) - 'graph6' (also sparse6), 'planar_code' or 'edgelist'
+    # returns:
+    # generator of (graph_id, A, rotation) triples
+    reader = READERS[fmt]
+    for path in paths:
+        for graph_id, A, rotation in reader(path):
+            yield graph_id, A, rotation
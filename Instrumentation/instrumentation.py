@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Optional per-phase instrumentation of the curvature routines.
+#
+# The routines mark their phases with `with phase('pinv'):` and their work with
+# count('solves', k). Nothing is recorded unless a recorder is active:
+#
+#   with instrument(track_memory=True) as rec:
+#       node_res_curvature(A)
+#   print(rec.to_json())
+#
+# When no recorder is active, phase() returns a shared no-op context manager and count()
+# returns right away, so the instrumented code pays one global lookup per call.
+#
+# The active recorder is shared by every thread (e.g. the thread pool of
+# component_res_curvature), so work done on worker threads is recorded too. Each thread
+# keeps its own stack of open phases, and the totals are updated under a lock. Traced memory
+# is per process, so with several threads running a phase's peak_bytes includes what the
+# others allocated meanwhile.
+
+_NO_PHASE = nullcontext()
+_active = None
+
+
+class Recorder:
+    # phases (dictionary) - for each phase name: calls, total seconds, peak_bytes (highest traced
+    #                       memory seen during any call, only with track_memory)
+    # counters (dictionary) - name -> total count
+    # callback (function, optional) - called with a dict (phase, seconds, peak_bytes) as each phase ends
+
+    def __init__(self, track_memory=False, callback=None):
+        self.track_memory = track_memory
+        self.callback = callback
+        self.phases = {}
+        self.counters = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        # open phases of the calling thread, innermost last
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _enter(self, name):
+        if self.track_memory:
+            if self._stack:
+                parent = self._stack[-1]
+                parent[2] = max(parent[2], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append([name, time.perf_counter(), 0])
+
+    def _exit(self):
+        name, start, peak = self._stack.pop()
+        seconds = time.perf_counter() - start
+        if self.track_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                parent = self._stack[-1]
+                parent[2] = max(parent[2], peak)
+        with self._lock:
+            record = self.phases.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+            record['calls'] += 1
+            record['seconds'] += seconds
+            record['peak_bytes'] = max(record['peak_bytes'], peak)
+        if self.callback is not None:
+            self.callback({'phase': name, 'seconds': seconds, 'peak_bytes': peak})
+
+    def to_dict(self):
+        return {'phases': self.phases, 'counters': self.counters}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+@contextmanager
+def _recorded_phase(recorder, name):
+    recorder._enter(name)
+    try:
+        yield
+    finally:
+        recorder._exit()
+
+
+def phase(name):
+    # context manager timing the enclosed block as phase `name` of the active recorder
+    if _active is None:
+        return _NO_PHASE
+    return _recorded_phase(_active, name)
+
+
+def count(name, k=1):
+    # add k to counter `name` of the active recorder
+    recorder = _active
+    if recorder is None:
+        return
+    with recorder._lock:
+        recorder.counters[name] = recorder.counters.get(name, 0) + k
+
+
+@contextmanager
+def instrument(track_memory=False, callback=None):
+    # input:
+    # track_memory (bool) - also record peak traced memory per phase (tracemalloc, slows allocations down)
+    # callback (function, optional) - called with a dict (phase, seconds, peak_bytes) as each phase ends
+    # yields:
+    # recorder (Recorder) - the phases and counters recorded inside the with block
+    global _active
+    previous = _active
+    recorder = Recorder(track_memory, callback)
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = recorder
+    try:
+        yield recorder
+    finally:
+        _active = previous
+        if started_tracing:
+            tracemalloc.stop()
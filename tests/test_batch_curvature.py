@@ -0,0 +1,24 @@
+import csv
+
+import networkx as nx
+
+from Batch_Driver.batch_curvature import run_batch
+
+
+def test_failed_graph_is_recorded_and_the_run_goes_on(tmp_path):
+    graphs = tmp_path / 'graphs.g6'
+    with open(graphs, 'wb') as f:
+        for G in (nx.icosahedral_graph(), nx.complete_graph(5), nx.octahedral_graph()):
+            f.write(nx.to_graph6_bytes(G, header=False))
+    output = str(tmp_path / 'out.csv')
+
+    assert run_batch([str(graphs)], 'graph6', 'forman', output, workers=1) == 3
+    with open(output, newline='') as f:
+        rows = {row['graph_id']: row for row in csv.DictReader(f)}
+    assert len(rows) == 3
+    assert rows['{}:1'.format(graphs)]['error'].startswith('ValueError')
+    assert rows['{}:0'.format(graphs)]['error'] == ''
+    assert rows['{}:2'.format(graphs)]['values'].split() == ['2'] * 12
+
+    # the failed graph counts as done, so a second run has nothing left
+    assert run_batch([str(graphs)], 'graph6', 'forman', output, workers=1) == 0
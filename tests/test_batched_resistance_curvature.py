@@ -0,0 +1,32 @@
+import numpy as np
+
+from Effective_Resistance_Curvatures.batched_resistance_curvature import batch_res_curvature, batch_node_res_curvature
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+
+
+def adjacency(n, edges):
+    A = np.zeros((n, n))
+    for u, v in edges:
+        A[u, v] = A[v, u] = 1
+    return A
+
+
+CYCLE = adjacency(4, [(0, 1), (1, 2), (2, 3), (3, 0)])
+PATH_AND_ISOLATED = adjacency(4, [(0, 1), (1, 2)])
+TWO_EDGES = adjacency(4, [(0, 1), (2, 3)])
+STAR = adjacency(4, [(0, 1), (0, 2), (0, 3)])
+
+
+def test_batch_matches_the_single_graph_functions():
+    stack = np.stack([CYCLE, PATH_AND_ISOLATED, STAR])
+    assert np.allclose(batch_res_curvature(stack), [res_curvature(A) for A in stack])
+    assert np.allclose(batch_node_res_curvature(stack), [node_res_curvature(A) for A in stack])
+
+
+def test_singular_omega_gives_a_nan_row():
+    # two disjoint edges: the rows of Omega of each edge sum to the same vector
+    curvature = batch_res_curvature(np.stack([CYCLE, TWO_EDGES, STAR]))
+    assert np.all(np.isnan(curvature[1]))
+    assert np.allclose(curvature[0], res_curvature(CYCLE))
+    assert np.allclose(curvature[2], res_curvature(STAR))
@@ -0,0 +1,58 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from Forman_Curvature.bitset_face_lattice import incidence_from_points, bitset_forman, bitset_p_vector
+from Forman_Curvature.forman_curvature_3polytope_graph import forman_result
+from Forman_Curvature.p_k_vector_3polytope_graph import p_k_vector
+
+
+PHI = (1 + 5 ** 0.5) / 2
+
+
+def cube():
+    return np.array(list(itertools.product([-1, 1], repeat=3)), dtype=float)
+
+
+def icosahedron():
+    return np.array([p for s, t in itertools.product([-1, 1], repeat=2)
+                     for p in ((0, s, t * PHI), (s, t * PHI, 0), (t * PHI, 0, s))], dtype=float)
+
+
+def truncated_octahedron():
+    base = set(itertools.permutations((0, 1, 2)))
+    return np.array(sorted(set(tuple(s * x for s, x in zip(signs, p)) for p in base
+                               for signs in itertools.product([-1, 1], repeat=3))), dtype=float)
+
+
+def random_simplicial(n=30, seed=0):
+    points = np.random.default_rng(seed).normal(size=(n, 3))
+    return points / np.linalg.norm(points, axis=1)[:, None]
+
+
+POLYTOPES = {'cube': cube, 'icosahedron': icosahedron, 'truncated_octahedron': truncated_octahedron,
+             'random_simplicial': random_simplicial}
+
+
+@pytest.mark.parametrize('name', sorted(POLYTOPES))
+def test_bitset_lattice_matches_the_planar_lattice(name):
+    # a 3-polytope's face lattice is the face lattice of its (planar) graph
+    incidence = incidence_from_points(POLYTOPES[name]())
+    result = bitset_forman(incidence)
+    A = np.zeros((len(incidence), len(incidence)))
+    A[result.edges_u, result.edges_v] = A[result.edges_v, result.edges_u] = 1
+    planar = forman_result(A)
+    assert np.array_equal(planar.edges_u, result.edges_u) and np.array_equal(planar.edges_v, result.edges_v)
+    assert np.array_equal(planar.values, result.values)
+    assert bitset_p_vector(incidence) == p_k_vector(A)
+
+
+def test_tesseract():
+    # every edge of the 4-cube: 2 vertices, 3 squares, 3 edges sharing a square but not a vertex,
+    # and none sharing a vertex but no square (two edges at a vertex span a square)
+    incidence = incidence_from_points(np.array(list(itertools.product([-1, 1], repeat=4)), dtype=float))
+    result = bitset_forman(incidence)
+    assert len(result.values) == 32
+    assert np.all(result.values == 2 + 3 - 3 - 0)
+    assert bitset_p_vector(incidence) == [0, 24]
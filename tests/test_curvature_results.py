@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from Curvature_Results.curvature_results import VertexCurvature, EdgeCurvature
+from Forman_Curvature.forman_curvature_3polytope_graph import forman_result, forman
+from Devos_Mohar_curvature.devos_mohar_curvature import devos_mohar_curvature, devos_mohar_curvature_result
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature, res_curvature_result
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature, node_res_curvature_result
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature, link_res_curvature_result
+
+
+def cube():
+    A = np.zeros((8, 8))
+    for u in range(8):
+        for bit in (1, 2, 4):
+            A[u, u ^ bit] = 1
+    return A
+
+
+def _shares_memory(arrow_column, array):
+    return arrow_column.chunk(0).buffers()[1].address == array.ctypes.data
+
+
+def test_edge_columns_are_contiguous():
+    edges = np.array([[0, 1], [0, 2], [1, 2]])
+    result = EdgeCurvature(3, edges[:, 0], edges[:, 1], np.ones(3))
+    for col in result.columns().values():
+        assert col.flags['C_CONTIGUOUS']
+
+
+def test_to_arrow_shares_memory_with_columns():
+    pytest.importorskip('pyarrow')
+    result = forman_result(cube())
+    table = result.to_arrow()
+    for name, col in result.columns().items():
+        assert _shares_memory(table.column(name), col)
+
+    vertex = VertexCurvature(np.arange(5.0))
+    table = vertex.to_arrow()
+    assert _shares_memory(table.column('value'), vertex.values)
+
+
+def test_producers_match_the_legacy_formats():
+    A = cube()
+    for result, legacy in ((devos_mohar_curvature_result(A), devos_mohar_curvature(A)),
+                           (res_curvature_result(A), res_curvature(A)),
+                           (node_res_curvature_result(A), node_res_curvature(A)),
+                           (node_res_curvature_result(A, sparse=True), node_res_curvature(A, sparse=True))):
+        assert isinstance(result, VertexCurvature)
+        assert np.allclose(result.tolist(), legacy)
+
+    assert forman_result(A).to_poset_dict() == forman(A)
+    for sparse in (False, True):
+        link = link_res_curvature_result(A, sparse=sparse)
+        assert isinstance(link, EdgeCurvature)
+        assert len(link) == 12 and np.all(link.edges_u < link.edges_v)
+        assert np.allclose(link.to_sparse().toarray(), link_res_curvature(A, sparse=sparse).toarray())
@@ -0,0 +1,59 @@
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.extreme_resistance_curvature import CurvatureQuery
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature
+from Effective_Resistance_Curvatures.sparse_resistance import edge_list
+
+
+def grid(rows, cols):
+    path = lambda m: sp.diags([np.ones(m - 1), np.ones(m - 1)], [-1, 1])
+    A = sp.kron(sp.identity(rows), path(cols)) + sp.kron(path(rows), sp.identity(cols))
+    return sp.csr_matrix(A)
+
+
+def weighted_ring(n, seed=0):
+    # a ring with random chords and random weights
+    rng = np.random.default_rng(seed)
+    u = np.concatenate([np.arange(n), rng.integers(0, n, n // 2)])
+    v = np.concatenate([(np.arange(n) + 1) % n, rng.integers(0, n, n // 2)])
+    keep = u != v
+    A = sp.coo_matrix((rng.uniform(0.5, 3, keep.sum()), (u[keep], v[keep])), shape=(n, n))
+    A = sp.csr_matrix(A + A.T)
+    return A
+
+
+def test_most_negative_and_below_are_exact():
+    for A in (grid(12, 15), weighted_ring(150)):
+        node = np.asarray(node_res_curvature(A, sparse=True))
+        u, v, _ = edge_list(A)
+        link = np.asarray(link_res_curvature(A, sparse=True)[u, v]).ravel()
+        query = CurvatureQuery(A)
+        for which, ref in (('node', node), ('link', link)):
+            result = query.most_negative(8, which)
+            assert result.complete
+            assert np.allclose(result.values, np.sort(ref)[:8])
+            # halfway across a gap, away from the ties of the symmetric graphs
+            ordered = np.sort(ref)
+            gap = 12 + np.flatnonzero(np.diff(ordered[12:]) > 1e-6)[0]
+            threshold = ordered[gap:gap + 2].mean()
+            result = query.below(threshold, which)
+            assert result.complete
+            assert set(result.index.tolist()) == set(np.flatnonzero(ref <= threshold).tolist())
+
+
+def test_bounds_reduce_the_solves():
+    A = grid(40, 40)
+    for which in ('node', 'link'):
+        result = CurvatureQuery(A).most_negative(10, which)
+        assert result.complete
+        assert result.n_solves < A.shape[0] // 10
+
+
+def test_max_solves_is_respected():
+    A = weighted_ring(300)
+    for which in ('node', 'link'):
+        for max_solves in (5, 20):
+            result = CurvatureQuery(A).most_negative(10, which, max_solves=max_solves)
+            assert result.n_solves <= max_solves
@@ -0,0 +1,58 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from Forman_Curvature.forman_curvature_3polytope_graph import forman
+
+
+def baseline_forman(graph):
+    # the counting of the original dict-and-poset implementation, with sets in place of the Sage poset:
+    # faces(e) + vertices(e) - edges sharing a face or a vertex with e but not both (with multiplicity)
+    n = len(graph)
+    _, embedding = nx.check_planarity(nx.Graph(graph))
+    edges = [(u, v) for u in range(n) for v in range(n) if u < v and graph[u][v] == 1]
+    faces = []
+    edge_faces = {e: [] for e in range(len(edges))}
+    for e, (u, v) in enumerate(edges):
+        for a, b in ((u, v), (v, u)):
+            walk = list(embedding.traverse_face(a, b))
+            known = [f for f, verts in enumerate(faces) if sorted(verts) == sorted(walk)]
+            if not known:
+                faces.append(walk)
+                known = [len(faces) - 1]
+            edge_faces[e] += known
+    face_edges = {f: [e for e in edge_faces if f in edge_faces[e]] for f in range(len(faces))}
+    vert_edges = {w: [e for e, (u, v) in enumerate(edges) if w in (u, v)] for w in range(n)}
+
+    forman_dict = {}
+    for e, (u, v) in enumerate(edges):
+        share_a_face = [j for f in edge_faces[e] for j in face_edges[f]]
+        share_a_vert = [j for w in (u, v) for j in vert_edges[w]]
+        parallel = [j for j in share_a_face if j not in share_a_vert] + [j for j in share_a_vert if j not in share_a_face]
+        forman_dict[n + 1 + e] = len(edge_faces[e]) + 2 - len(parallel)
+    return forman_dict
+
+
+GRAPHS = {
+    'tetrahedron': nx.tetrahedral_graph(),
+    'cube': nx.cubical_graph(),
+    'octahedron': nx.octahedral_graph(),
+    'dodecahedron': nx.dodecahedral_graph(),
+    'icosahedron': nx.icosahedral_graph(),
+    'truncated_tetrahedron': nx.truncated_tetrahedron_graph(),
+    'wheel': nx.wheel_graph(9),
+}
+
+
+@pytest.mark.parametrize('name', sorted(GRAPHS))
+def test_array_forman_matches_the_baseline(name):
+    A = nx.to_numpy_array(GRAPHS[name])
+    assert forman(A) == baseline_forman(A)
+
+
+def test_array_forman_on_relabeled_graphs():
+    rng = np.random.default_rng(0)
+    A = nx.to_numpy_array(nx.icosahedral_graph())
+    perm = rng.permutation(len(A))
+    B = A[np.ix_(perm, perm)]
+    assert forman(B) == baseline_forman(B)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+sage = pytest.importorskip('sage.all')
+
+from Forman_Curvature.forman_curvature_sagemath import forman
+from Forman_Curvature.p_k_vector_sagemath import i_sided_2faces
+from Forman_Curvature.forman_curvature_3polytope_graph import forman_result
+from Forman_Curvature.p_k_vector_3polytope_graph import p_k_vector
+from Forman_Curvature.bitset_face_lattice import bitset_forman, bitset_p_vector
+
+
+POLYTOPES = ('cube', 'octahedron', 'dodecahedron', 'icosahedron', 'truncated_octahedron')
+# full-dimensional, so incidence_matrix() has a column per facet and none for equations
+HIGHER = (('hypercube', 4), ('cross_polytope', 4), ('twenty_four_cell',), ('cyclic_polytope', 4, 8), ('cyclic_polytope', 4, 10))
+
+
+def _adjacency(poly):
+    return np.array(poly.vertex_graph().adjacency_matrix(), dtype=float)
+
+
+def _incidence(poly):
+    # vertex-facet incidences: a row per vertex, a column per facet
+    return np.array(poly.incidence_matrix(), dtype=bool)
+
+
+@pytest.mark.parametrize('name', POLYTOPES)
+def test_sage_forman_matches_planar_forman(name):
+    poly = getattr(sage.polytopes, name)()
+    assert sorted(forman(poly).values()) == sorted(forman_result(_adjacency(poly)).tolist())
+    assert i_sided_2faces(poly) == p_k_vector(_adjacency(poly))
+
+
+@pytest.mark.parametrize('name_args', [(name,) for name in POLYTOPES] + list(HIGHER))
+def test_bitset_lattice_matches_sage(name_args):
+    poly = getattr(sage.polytopes, name_args[0])(*name_args[1:])
+    assert sorted(forman(poly).values()) == sorted(bitset_forman(_incidence(poly)).tolist())
+    assert i_sided_2faces(poly) == bitset_p_vector(_incidence(poly))
@@ -0,0 +1,35 @@
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from Graph_IO.graph_cache import graph_key
+from Effective_Resistance_Curvatures.resistance_context import resistance_context, clear_cache
+from Curvature_Pipeline.compute_all import compute_all
+from Curvature_Pipeline.result_cache import ResultCache
+
+
+def test_dense_and_sparse_inputs_share_a_key():
+    A = nx.to_numpy_array(nx.icosahedral_graph())
+    assert graph_key(A) == graph_key(sp.csr_matrix(A))
+    assert graph_key(A, True, 'direct') == graph_key(sp.csr_matrix(A), True, 'direct')
+    assert graph_key(A, True, 'direct') != graph_key(A, False, 'direct')
+    assert graph_key(A) != graph_key(2 * A)
+
+    clear_cache()
+    assert resistance_context(A) is resistance_context(sp.csr_matrix(A))
+    assert resistance_context(A) is not resistance_context(A, sparse=True)
+    clear_cache()
+
+
+def test_result_entries_depend_on_the_solve_mode_and_the_embedding(tmp_path):
+    A = nx.to_numpy_array(nx.icosahedral_graph())
+    cache = ResultCache(str(tmp_path))
+    dense = compute_all(A, cache=cache)
+    sparse = compute_all(A, sparse=True, cache=cache)
+    assert np.allclose(dense['vertices']['dos_resistance'], sparse['vertices']['dos_resistance'])
+    # planar entries are shared, resistance entries are not
+    assert len(list(tmp_path.iterdir())) == 3
+
+    _, embedding = nx.check_planarity(nx.Graph(A))
+    compute_all(A, which=('forman',), embedding=embedding, cache=cache)
+    assert len(list(tmp_path.iterdir())) == 4
@@ -0,0 +1,73 @@
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from Graph_IO.graph_readers import read_graphs
+from Face_Lattice.planar_face_lattice import rotation_arrays
+
+
+def adjacency(G):
+    return nx.to_scipy_sparse_array(G, nodelist=range(len(G)), format='csr')
+
+
+def same_graph(A, B):
+    return A.shape == B.shape and (sp.csr_matrix(A, dtype=float) != sp.csr_matrix(B, dtype=float)).nnz == 0
+
+
+def planar_code(G, header=True):
+    # plantri's planar_code: n, then the clockwise neighbors (1-based) of each vertex, each list ending in 0
+    n = len(G)
+    _, embedding = nx.check_planarity(G)
+    rot_offsets, rot_neighbors = rotation_arrays(embedding, n)
+    entries = []
+    for v in range(n):
+        entries += (rot_neighbors[rot_offsets[v]:rot_offsets[v + 1]] + 1).tolist() + [0]
+    if n < 256:
+        body = bytes([n] + entries)
+    else:
+        body = bytes([0]) + np.array([n] + entries, dtype='<u2').tobytes()
+    return (b'>>planar_code<<' if header else b'') + body, (rot_offsets, rot_neighbors)
+
+
+# rebuilt with the nodes in label order: the writers of networkx number them in iteration order
+GRAPHS = [nx.from_scipy_sparse_array(adjacency(G)) for G in (
+    nx.icosahedral_graph(), nx.petersen_graph(), nx.path_graph(70), nx.empty_graph(3), nx.gnp_random_graph(40, 0.2, seed=1))]
+
+
+def test_graph6_and_sparse6_round_trip(tmp_path):
+    path = tmp_path / 'graphs.g6'
+    lines = [nx.to_graph6_bytes(G, header=False) for G in GRAPHS]
+    lines += [nx.to_sparse6_bytes(G, header=False) for G in GRAPHS if G.number_of_edges()]
+    path.write_bytes(b'>>graph6<<' + b''.join(lines))
+    read = list(read_graphs([str(path)], 'graph6'))
+    expected = GRAPHS + [G for G in GRAPHS if G.number_of_edges()]
+    assert len(read) == len(expected)
+    for (graph_id, A, rotation), G in zip(read, expected):
+        assert same_graph(A, adjacency(G))
+        assert rotation is None
+    assert read[1][0] == '{}:1'.format(path)
+
+
+def test_planar_code_round_trip(tmp_path):
+    small = nx.dodecahedral_graph()
+    large = nx.convert_node_labels_to_integers(nx.grid_2d_graph(20, 15))
+    first, small_rotation = planar_code(small)
+    second, large_rotation = planar_code(large, header=False)
+    path = tmp_path / 'graphs.pc'
+    path.write_bytes(first + second)
+    read = list(read_graphs([str(path)], 'planar_code'))
+    assert len(read) == 2
+    for (_, A, rotation), G, written in zip(read, [small, large], [small_rotation, large_rotation]):
+        assert same_graph(A, adjacency(G))
+        assert np.array_equal(rotation[0], written[0])
+        assert np.array_equal(rotation[1], written[1])
+
+
+def test_edgelist_round_trip(tmp_path):
+    G = nx.gnp_random_graph(30, 0.2, seed=2)
+    path = tmp_path / 'graph.txt'
+    edges = np.array(G.edges())
+    np.savetxt(path, np.vstack([edges, [[29, 29]]]), fmt='%d')
+    (_, A, rotation), = read_graphs([str(path)], 'edgelist')
+    assert same_graph(A, adjacency(G))
+    assert rotation is None
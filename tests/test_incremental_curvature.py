@@ -0,0 +1,71 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from Effective_Resistance_Curvatures.incremental_resistance_curvature import IncrementalResistanceCurvature
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature
+from Face_Lattice.incremental_planar_curvature import IncrementalPlanarCurvature
+from Devos_Mohar_curvature.devos_mohar_curvature import devos_mohar_curvature
+from Forman_Curvature.forman_curvature_3polytope_graph import forman_arrays
+
+
+def test_resistance_updates_match_recomputing():
+    A = nx.to_numpy_array(nx.connected_watts_strogatz_graph(40, 4, 0.3, seed=0))
+    inc = IncrementalResistanceCurvature(A)
+    u, v = np.argwhere(np.triu(A) == 0)[5]
+    steps = [('add', u, v, 1.0), ('set', u, v, 2.5), ('remove', u, v, 0.0)]
+    a, b = np.argwhere(np.triu(A, k=1))[3]
+    steps += [('set', a, b, 0.25)]
+    for op, i, j, w in steps:
+        if op == 'add':
+            inc.add_edge(i, j, w)
+        elif op == 'remove':
+            inc.remove_edge(i, j)
+        else:
+            inc.set_edge_weight(i, j, w)
+        A[i, j] = A[j, i] = w
+        assert np.allclose(inc.node_res_curvature(), node_res_curvature(A))
+        assert np.allclose(inc.link_res_curvature().toarray(), link_res_curvature(A).toarray())
+
+
+def test_removing_a_bridge_raises():
+    inc = IncrementalResistanceCurvature(nx.to_numpy_array(nx.path_graph(4)))
+    with pytest.raises(ValueError):
+        inc.remove_edge(1, 2)
+
+
+def _rotation(inc):
+    # rotation system of the current embedding, as planar_face_lattice takes it
+    lists = [inc.rotation[w] for w in range(inc.n)]
+    rot_offsets = np.concatenate([[0], np.cumsum([len(r) for r in lists])])
+    rot_neighbors = np.array([x for r in lists for x in r], dtype=np.int64)
+    return rot_offsets, rot_neighbors
+
+
+def _check_against_recomputing(inc, A):
+    rotation = _rotation(inc)
+    assert np.allclose(inc.devos_mohar_curvature(), devos_mohar_curvature(A, rotation))
+    edges_u, edges_v, values = forman_arrays(A, rotation)
+    assert inc.forman() == {(int(u), int(v)): int(x) for u, v, x in zip(edges_u, edges_v, values)}
+
+
+def test_planar_updates_match_recomputing():
+    A = nx.to_numpy_array(nx.dodecahedral_graph())
+    inc = IncrementalPlanarCurvature(A)
+    _check_against_recomputing(inc, A)
+
+    # a chord across a pentagon, then one across one of the two faces it made
+    for _ in range(2):
+        face = max(inc.faces, key=lambda f: len(inc.faces[f]))
+        walk = [h[0] for h in inc.faces[face]]
+        u, v = walk[0], walk[2]
+        inc.add_edge(u, v, face)
+        A[u, v] = A[v, u] = 1
+        _check_against_recomputing(inc, A)
+
+    # removing an original edge merges two faces
+    u, v = map(int, np.argwhere(np.triu(A, k=1))[0])
+    inc.remove_edge(u, v)
+    A[u, v] = A[v, u] = 0
+    _check_against_recomputing(inc, A)
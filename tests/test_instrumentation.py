@@ -0,0 +1,32 @@
+import threading
+import time
+
+from Instrumentation.instrumentation import instrument, phase, count
+
+
+def test_phases_on_several_threads_do_not_interleave():
+    barrier = threading.Barrier(4)
+    ended = []
+
+    def work(i):
+        with phase('outer_{}'.format(i)):
+            barrier.wait()
+            with phase('inner'):
+                time.sleep(0.01 * (4 - i))
+                count('items', 1)
+
+    def on_end(record):
+        ended.append((record['phase'], threading.current_thread().name))
+
+    with instrument(callback=on_end) as rec:
+        threads = [threading.Thread(target=work, args=(i,), name=str(i)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert rec.counters == {'items': 4}
+    assert rec.phases['inner']['calls'] == 4
+    # every phase is closed by the thread that opened it
+    assert sorted(p for p, _ in ended if p != 'inner') == ['outer_{}'.format(i) for i in range(4)]
+    assert all(p == 'inner' or p == 'outer_' + name for p, name in ended)
@@ -0,0 +1,30 @@
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature
+from Effective_Resistance_Curvatures.matrix_free_resistance import matrix_free_res_curvature
+from Effective_Resistance_Curvatures.resistance_context import ResistanceContext
+
+
+def weighted_graph(n=120, seed=0):
+    G = nx.barabasi_albert_graph(n, 2, seed=seed)
+    A = sp.triu(nx.to_scipy_sparse_array(G, format='csr'), k=1).tocsr()
+    A.data = np.random.default_rng(seed).uniform(0.5, 2, A.nnz)
+    return sp.csr_matrix(A + A.T)
+
+
+def test_exact_mode_matches_the_dense_pseudo_inverse():
+    A = weighted_graph()
+    ref = np.array(res_curvature(A))
+    assert np.allclose(matrix_free_res_curvature(A), ref)
+    assert np.allclose(matrix_free_res_curvature(A, solver='cg'), ref)
+    assert np.allclose(ResistanceContext(A, sparse=True).res_curvature(), ref)
+
+
+def test_sketched_mode_is_within_eps():
+    A = weighted_graph(300)
+    ref = np.array(res_curvature(A))
+    eps = 0.3
+    x = matrix_free_res_curvature(A, eps=eps, seed=1)
+    assert np.abs(x - ref).max() <= eps * np.abs(ref).max()
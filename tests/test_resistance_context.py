@@ -0,0 +1,22 @@
+import networkx as nx
+import numpy as np
+
+from Effective_Resistance_Curvatures import resistance_context as rc
+from Effective_Resistance_Curvatures.DOS_resistance_curvature import res_curvature
+
+
+def test_the_cache_limit_holds_when_a_cached_context_grows():
+    A = nx.to_numpy_array(nx.icosahedral_graph())
+    B = nx.to_numpy_array(nx.dodecahedral_graph())
+    rc.clear_cache()
+    try:
+        old = rc.resistance_context(B)
+        ctx = rc.resistance_context(A)
+        rc.set_cache_limit(old.nbytes() + ctx.nbytes())
+        # materializes Omega: the least recently used context makes room
+        assert np.allclose(ctx.res_curvature(), res_curvature(A))
+        assert sum(c.nbytes() for c in rc._cache.values()) <= rc._cache_limit
+        assert list(rc._cache.values()) == [ctx]
+    finally:
+        rc.set_cache_limit(2 ** 30)
+        rc.clear_cache()
@@ -0,0 +1,53 @@
+import networkx as nx
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from Effective_Resistance_Curvatures.sparse_resistance import edge_resistances
+from Effective_Resistance_Curvatures.node_resistance_curvature import node_res_curvature
+from Effective_Resistance_Curvatures.link_resistance_curvature import link_res_curvature
+
+
+def weighted_graph(n=200, seed=0):
+    G = nx.connected_watts_strogatz_graph(n, 6, 0.2, seed=seed)
+    A = sp.triu(nx.to_scipy_sparse_array(G, format='csr'), k=1).tocsr()
+    A.data = np.random.default_rng(seed).uniform(0.5, 2, A.nnz)
+    return sp.csr_matrix(A + A.T)
+
+
+def baseline_omega(A):
+    # the original dense computation: pinv of the Laplacian
+    A_np = A.toarray()
+    L_inv = np.linalg.pinv(np.diag(np.sum(A_np, axis=1)) - A_np)
+    d = np.diag(L_inv)
+    return d[:, None] + d[None, :] - 2 * L_inv, d
+
+
+@pytest.mark.parametrize('solver', ['direct', 'cg'])
+def test_exact_edge_resistances_match_pinv(solver):
+    A = weighted_graph()
+    Omega, d = baseline_omega(A)
+    u, v, w, omega, lplus_diag = edge_resistances(A, solver=solver, block_size=64)
+    assert np.allclose(w, A[u, v])
+    assert np.allclose(omega, Omega[u, v])
+    assert np.allclose(lplus_diag, d)
+
+
+def test_sketched_edge_resistances_are_within_eps():
+    A = weighted_graph()
+    Omega, d = baseline_omega(A)
+    eps = 0.3
+    u, v, _, omega, lplus_diag = edge_resistances(A, eps=eps, seed=0, block_size=64)
+    assert np.all(np.abs(omega / Omega[u, v] - 1) <= eps)
+    assert np.all(np.abs(lplus_diag / d - 1) <= eps)
+
+
+def test_sparse_curvatures_match_the_dense_baseline():
+    A = weighted_graph()
+    Omega, _ = baseline_omega(A)
+    node = 1 - 0.5 * np.sum(A.toarray() * Omega, axis=1)
+    assert np.allclose(node_res_curvature(A, sparse=True), node)
+    assert np.allclose(node_res_curvature(A, sparse=True), node_res_curvature(A))
+    u, v = A.nonzero()
+    link = 2 * (node[u] + node[v]) / Omega[u, v]
+    assert np.allclose(np.asarray(link_res_curvature(A, sparse=True)[u, v]).ravel(), link)